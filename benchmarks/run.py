@@ -0,0 +1,239 @@
+"""
+Benchmarks de los caminos calientes (ruteo, protocolo, manejo de mensajes).
+
+    python -m benchmarks.run                 # corre todo y compara con baseline.json
+    python -m benchmarks.run --save          # guarda los resultados como nuevo baseline
+    python -m benchmarks.run -k spf --quick  # solo los que contienen "spf", tamaños chicos
+
+Cada caso reporta ops/s (mediana de varias rondas) y el pico de memoria de una
+ejecución (tracemalloc). Contra el baseline se marca REGRESSION si ops/s cae más
+de --tolerance.
+"""
+import argparse, asyncio, contextlib, io, json, platform, random, statistics, sys, tempfile, time, tracemalloc
+from pathlib import Path
+from src.algorithms.dijkstra import dijkstra
+from src.algorithms.distance_vector import DistanceVector
+from src.algorithms.link_state import LinkState
+from src.core.protocol import Codec, make_codec
+from src.core.topology import CompiledTopology, compile_topology
+from src.core.transport import LoopbackBus, Outbox
+from src.core.utils import make_msg
+from src.node import Node
+from src.sec30_node import Sec30Node
+from src.simulator import random_topology
+
+BASELINE = Path(__file__).with_name("baseline.json")
+TMP = Path(tempfile.mkdtemp(prefix="bench-"))
+
+# ---------- datos sintéticos ----------
+def graph(n, seed=1, prefix="N"):
+    return random_topology(n, degree=4, seed=seed, prefix=prefix)
+
+def lsps(topo):
+    return [{"src": u, "seq": 1, "links": dict(nbrs)} for u, nbrs in topo.items()]
+
+def load_lsdb(ls, topo):
+    # el LSP propio se origina; los demás llegan como de la red
+    for l in lsps(topo):
+        if l["src"] == ls.node_id:
+            ls.originate(l["links"], 0)
+        else:
+            ls.ingest_lsp(l)
+
+def sec30_node(topo):
+    ids = sorted(topo)
+    node = Sec30Node(ids[0], topo)
+    for u, nbrs in topo.items():
+        for v, w in nbrs.items():
+            node._set_edge(u, v, w)
+    return node
+
+# ---------- casos ----------
+def cases(sizes):
+    out = []
+    for n in sizes:
+        topo = graph(n)
+        src = sorted(topo)[0]
+        out.append((f"dijkstra[n={n}]", lambda t=topo, s=src: dijkstra(t, s)))
+
+        def ls_full(t=topo, s=src):
+            ls = LinkState(s)
+            load_lsdb(ls, t)
+            ls.compute_spf()
+        out.append((f"linkstate.compute_spf.full[n={n}]", ls_full))
+
+        ls = LinkState(src)
+        load_lsdb(ls, topo)
+        ls.compute_spf()
+        rng = random.Random(2)
+        ids = sorted(topo)
+        def ls_incr(ls=ls, t=topo, rng=rng, ids=ids[1:]):
+            u = rng.choice(ids)
+            links = {v: rng.randint(1, 20) for v in t[u]}
+            ls.ingest_lsp({"src": u, "seq": ls.lspdb[u]["seq"] + 1, "links": links})
+            ls.compute_spf()
+        out.append((f"linkstate.compute_spf.incremental[n={n}]", ls_incr))
+
+        def ls_ecmp(t=topo, s=src):
+            ls = LinkState(s, ecmp_paths=4)
+            load_lsdb(ls, t)
+            ls.compute_spf()
+        out.append((f"linkstate.compute_spf.ecmp[n={n}]", ls_ecmp))
+
+        dv = DistanceVector(src)
+        for v, w in topo[src].items():
+            dv.set_neighbor_cost(v, w)
+        dist_from = {v: dijkstra(topo, v)[0] for v in topo[src]}
+        for v, d in dist_from.items():
+            dv.ingest_vector(v, d)
+        def dv_full(dv=dv):
+            dv.recompute(full=True)
+        out.append((f"distance_vector.recompute.full[n={n}]", dv_full))
+        neigh = sorted(topo[src])[0]
+        def dv_one(dv=dv, neigh=neigh, rng=rng, ids=ids):
+            d = rng.choice(ids)
+            dv.ingest_vector(neigh, {d: rng.randint(1, 200)}, partial=True)
+            dv.recompute()
+        out.append((f"distance_vector.recompute.one_entry[n={n}]", dv_one))
+
+        # arranque de un proceso de nodo: su fila de la topología + canales + tabla de ids del codec
+        names = {u: u for u in topo}
+        tj, nj, tc = TMP / f"topo{n}.json", TMP / f"names{n}.json", TMP / f"topo{n}.topo"
+        tj.write_text(json.dumps({"config": topo})); nj.write_text(json.dumps({"config": names}))
+        tc.write_bytes(compile_topology(topo, names))
+        def load_json(tj=tj, nj=nj, s=src):
+            t, nm = json.loads(tj.read_text())["config"], json.loads(nj.read_text())["config"]
+            return t.get(s, {}), nm[s], make_codec(nm.keys())
+        out.append((f"topology.load.json[n={n}]", load_json))
+        def load_compiled(tc=tc, s=src):
+            ct = CompiledTopology(str(tc))
+            cm = ct.channel_map()
+            r = ct.neighbors(s), cm[s], make_codec(cm.keys())
+            ct.close()
+            return r
+        out.append((f"topology.load.compiled[n={n}]", load_compiled))
+
+        stopo = graph(n, prefix="sec30")
+        snode = sec30_node(stopo)
+        sids = sorted(stopo)
+        out.append((f"sec30.dijkstra[n={n}]", lambda nd=snode: nd.dijkstra(nd.id)))
+        def path_all(nd=snode, ids=sids):
+            nd.graph_version += 1  # invalida el SPT: incluye un cálculo por ronda
+            for d in ids:
+                nd._path_info(d)
+        out.append((f"sec30._path_info.all_dests[n={n}]", path_all))
+
+    ids = [f"sec30.grupo{i}.nodo{i}" for i in range(1, 200)] + [f"N{i}" for i in range(1, 200)]
+    samples = {
+        "sec30_link": {"type": "message", "from": ids[0], "to": ids[1], "hops": 4},
+        "hello": make_msg("lsr", "hello", "N1", "N2", headers=[{"id": "7f0c1f9e-4c1e-4bd8-9a6b-0c3b0b9d3e11"}]),
+        "lsp": make_msg("lsr", "info", "N1", "N2", payload={"lsp": {"src": "N1", "seq": 9,
+                        "links": {f"N{i}": i for i in range(2, 12)}}}),
+    }
+    for wire in ("json", "bin"):
+        codec = Codec(ids, wire)
+        for name, m in samples.items():
+            raw = codec.encode(m)
+            out.append((f"protocol.encode.{wire}.{name}", lambda c=codec, m=m: c.encode(m)))
+            out.append((f"protocol.decode.{wire}.{name}", lambda c=codec, r=raw: c.decode(r)))
+
+    out.extend(handler_cases())
+    return out
+
+def handler_cases():
+    # transporte sin suscriptores: publish no entrega nada, solo se mide el manejo
+    topo = graph(50)
+    ids = sorted(topo)
+    me = ids[0]
+    names = {u: u for u in ids}
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    node = Node(me, "lsr", topo[me], names, transport=LoopbackBus().transport())
+    nb = sorted(topo[me])[0]
+    hello = make_msg("lsr", "hello", nb, me, headers=[{"id": "x"}])
+    data = make_msg("lsr", "message", nb, ids[-1], payload={"text": "hi"})
+    seq = [0]
+    def lsp_msg():
+        seq[0] += 1
+        return make_msg("lsr", "info", nb, me, payload={"lsp": {"src": ids[5], "seq": seq[0],
+                                                                "links": {u: random.randint(1, 9) for u in topo[ids[5]]}}})
+    load_lsdb(node.ls, topo)
+    node._recompute_tables()
+    run = loop.run_until_complete
+    snode = Sec30Node("sec30.grupo1.nodo1", {"sec30.grupo1.nodo1": {"sec30.grupo2.nodo2": 1}},
+                      transport=LoopbackBus().transport())
+    snode.outbox = Outbox(snode.transport)
+    w = [0]
+    def s_msg():
+        w[0] += 1
+        return {"type": "message", "from": "sec30.grupo3.nodo3", "to": "sec30.grupo4.nodo4", "hops": w[0]}
+    return [
+        ("node._handle_message.hello", lambda: run(node._handle_message(dict(hello)))),
+        ("node._handle_message.data", lambda: run(node._handle_message(dict(data)))),
+        ("node._handle_message.lsp", lambda: run(node._handle_message(lsp_msg()))),
+        ("sec30._on_message.new_edge", lambda: run(snode._on_message(s_msg(), None))),
+    ]
+
+# ---------- medición ----------
+def measure(fn, min_time, rounds):
+    fn()  # calentamiento
+    per_round = []
+    for _ in range(rounds):
+        n, t0 = 0, time.perf_counter()
+        while True:
+            fn(); n += 1
+            dt = time.perf_counter() - t0
+            if dt >= min_time:
+                break
+        per_round.append(n / dt)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(per_round), peak
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-k", dest="filter", default=None, help="Solo casos cuyo nombre contenga este texto")
+    ap.add_argument("--quick", action="store_true", help="Tamaños chicos y rondas cortas")
+    ap.add_argument("--save", action="store_true", help="Guardar resultados como baseline")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Caída de ops/s tolerada vs baseline")
+    args = ap.parse_args()
+
+    sizes = [100, 500] if args.quick else [100, 1000, 5000]
+    min_time, rounds = (0.05, 3) if args.quick else (0.2, 5)
+    base_path = Path(args.baseline)
+    baseline = json.loads(base_path.read_text())["results"] if base_path.exists() else {}
+
+    results, regressions = {}, []
+    print(f"{'case':52} {'ops/s':>12} {'peak KiB':>10} {'vs base':>9}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_cases = cases(sizes)
+    for name, fn in all_cases:
+        if args.filter and args.filter not in name:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            ops, peak = measure(fn, min_time, rounds)
+        results[name] = {"ops_s": round(ops, 2), "peak_kib": round(peak / 1024, 1)}
+        ref = baseline.get(name)
+        cmp = "-"
+        if ref:
+            ratio = ops / ref["ops_s"]
+            cmp = f"{ratio:.2f}x"
+            if ratio < 1 - args.tolerance:
+                cmp += " REGRESSION"
+                regressions.append(name)
+        print(f"{name:52} {ops:12.1f} {peak/1024:10.1f} {cmp:>9}", flush=True)
+
+    if args.save:
+        merged = dict(baseline); merged.update(results)
+        base_path.write_text(json.dumps({"python": platform.python_version(), "results": merged},
+                                        indent=1, sort_keys=True) + "\n")
+        print(f"baseline guardado en {base_path}")
+    if regressions:
+        print(f"{len(regressions)} regresiones: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import heapq
+from .spf import next_hop_sets
 
-def dijkstra(graph, start):
+def dijkstra(graph, start, multipath:int=1, tolerance:float=0.0):
     # graph: dict[node] -> dict[neighbor] = weight
+    # multipath > 1: nexthop[dest] es una tupla con hasta `multipath` saltos de costo igual (o dentro de tolerance)
     dist = {v: float('inf') for v in graph}
     prev = {v: None for v in graph}
     dist[start] = 0
@@ -16,6 +18,8 @@ def dijkstra(graph, start):
                 dist[v] = nd
                 prev[v] = u
                 heapq.heappush(pq, (nd, v))
+    if multipath > 1:
+        return dist, next_hop_sets(graph, dist, start, tolerance, multipath)
     # Build next-hop table from prev
     nexthop = {}
     for dest in graph:
@@ -1,49 +1,109 @@
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Set
+
+INF = float('inf')
 
 class DistanceVector:
-    def __init__(self, node_id):
+    def __init__(self, node_id, max_cost:float=INF):
         self.node_id = node_id
         # table[dest] = {"cost": cost, "next": neighbor}
         self.table: Dict[str, Dict] = {node_id: {"cost": 0, "next": node_id}}
         self.cost_to_neighbor = {}  # neighbor -> cost
         self.vectors_from_neighbors = {}  # neighbor -> its vector
+        self.heard: Dict[str, float] = {}  # neighbor -> cuándo llegó su último vector (s)
+        # costos >= max_cost cuentan como inalcanzables (corta el count-to-infinity)
+        self.max_cost = max_cost
+        self.dirty: Set[str] = set()    # destinos a recalcular
+        self.changed: Set[str] = set()  # destinos que cambiaron desde el ultimo take_changed()
 
     def set_neighbor_cost(self, neigh, cost):
+        if self.cost_to_neighbor.get(neigh) == cost:
+            return
         self.cost_to_neighbor[neigh] = cost
+        # todo lo que se alcanza (o podria alcanzarse) por ese vecino
+        self.dirty.add(neigh)
+        self.dirty.update(self.vectors_from_neighbors.get(neigh, {}))
+        self.dirty.update(d for d, row in self.table.items() if row["next"] == neigh)
+
+    def ingest_vector(self, neigh, vector: Dict[str, float], partial:bool=False, now:float=0.0):
+        old = self.vectors_from_neighbors.get(neigh, {})
+        self.heard[neigh] = now
+        if partial:
+            new = dict(old); new.update(vector)
+            keys = vector.keys()
+        else:
+            new = dict(vector)
+            keys = set(old) | set(new)
+        self.vectors_from_neighbors[neigh] = new
+        self.dirty.update(d for d in keys if old.get(d) != new.get(d))
 
-    def ingest_vector(self, neigh, vector: Dict[str, float]):
-        self.vectors_from_neighbors[neigh] = vector
+    def age_out(self, now:float, hold:float) -> List[str]:
+        """Descarta los vectores de vecinos callados más de `hold` s; devuelve esos vecinos."""
+        dead = [n for n, t in self.heard.items() if now - t > hold]
+        for n in dead:
+            del self.heard[n]
+            self.dirty.update(self.vectors_from_neighbors.pop(n, {}))
+            self.dirty.update(d for d, row in self.table.items() if row["next"] == n)
+        return dead
+
+    def _best(self, dest):
+        best_cost = INF
+        best_next = None
+        for n, vec in self.vectors_from_neighbors.items():
+            if n not in self.cost_to_neighbor:
+                continue
+            c = self.cost_to_neighbor[n] + vec.get(dest, INF)
+            if c < best_cost:
+                best_cost = c
+                best_next = n
+        # direct neighbor?
+        if dest in self.cost_to_neighbor and self.cost_to_neighbor[dest] < best_cost:
+            best_cost = self.cost_to_neighbor[dest]
+            best_next = dest
+        if best_cost >= self.max_cost:
+            return INF, None
+        return best_cost, best_next
 
-    def recompute(self):
-        # Bellman-Ford update
+    def recompute(self, full:bool=False):
+        # Bellman-Ford update, solo sobre los destinos afectados (o todos si full)
+        if full:
+            dests = set(self.cost_to_neighbor)
+            for vec in self.vectors_from_neighbors.values():
+                dests.update(vec)
+        else:
+            dests = self.dirty
         changed = False
-        nodes = set([self.node_id])
-        for n,vec in self.vectors_from_neighbors.items():
-            nodes.update(vec.keys())
-        for dest in nodes:
-            if dest == self.node_id: 
+        for dest in dests:
+            if dest == self.node_id:
                 continue
-            best_cost = float('inf')
-            best_next = None
-            for n, vec in self.vectors_from_neighbors.items():
-                if n not in self.cost_to_neighbor: 
-                    continue
-                c_n = self.cost_to_neighbor[n]
-                c_d = vec.get(dest, float('inf'))
-                c = c_n + c_d
-                if c < best_cost:
-                    best_cost = c
-                    best_next = n
-            # direct neighbor?
-            if dest in self.cost_to_neighbor and self.cost_to_neighbor[dest] < best_cost:
-                best_cost = self.cost_to_neighbor[dest]
-                best_next = dest
-            prev = self.table.get(dest, {"cost": float('inf'), "next": None})
+            best_cost, best_next = self._best(dest)
+            prev = self.table.get(dest, {"cost": INF, "next": None})
             if best_cost != prev["cost"] or best_next != prev["next"]:
                 self.table[dest] = {"cost": best_cost, "next": best_next}
+                self.changed.add(dest)
                 changed = True
+        self.dirty = set()
         return changed
 
-    def export_vector(self) -> Dict[str, float]:
-        # distance vector: only cost to each destination
-        return {dest: row["cost"] for dest,row in self.table.items()}
+    def take_changed(self) -> Set[str]:
+        out, self.changed = self.changed, set()
+        return out
+
+    def export_vector(self, to:Optional[str]=None, only:Optional[Iterable[str]]=None,
+                      poison_reverse:bool=True) -> Dict[str, float]:
+        """
+        distance vector: only cost to each destination.
+        to: vecino destino -> split horizon (poison_reverse=False omite la ruta)
+            o poison reverse (la anuncia con costo infinito) para rutas que pasan por el.
+        only: exportar solo esos destinos (actualizacion disparada).
+        """
+        keys = self.table.keys() if only is None else [d for d in only if d in self.table]
+        vec = {}
+        for dest in keys:
+            row = self.table[dest]
+            if to is not None and row["next"] == to and dest != to:
+                if not poison_reverse:
+                    continue
+                vec[dest] = INF
+            else:
+                vec[dest] = row["cost"]
+        return vec
@@ -1,14 +1,66 @@
+import time
+from collections import OrderedDict
+
+class SeenCache:
+    """
+    ids de mensajes ya vistos, acotado: como maximo `capacity` entradas (se
+    descarta la menos reciente) y cada entrada vence `ttl` segundos despues de
+    su ultimo uso. Todas las operaciones son O(1) amortizado.
+    """
+    def __init__(self, capacity:int=65536, ttl:float=120.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._d: "OrderedDict[str, float]" = OrderedDict()  # id -> vence_en
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _expire(self, now:float):
+        d = self._d
+        while d:
+            if next(iter(d.values())) > now:
+                break
+            d.popitem(last=False)
+            self.expired += 1
+
+    def check_and_add(self, key:str) -> bool:
+        """True si ya se habia visto (duplicado); si no, lo registra."""
+        now = self.clock()
+        self._expire(now)
+        d = self._d
+        if key in d:
+            d.move_to_end(key)
+            d[key] = now + self.ttl
+            self.hits += 1
+            return True
+        self.misses += 1
+        d[key] = now + self.ttl
+        if len(d) > self.capacity:
+            d.popitem(last=False)
+            self.evictions += 1
+        return False
+
+    def __contains__(self, key:str) -> bool:
+        exp = self._d.get(key)
+        return exp is not None and exp > self.clock()
+
+    def __len__(self):
+        return len(self._d)
+
+    def stats(self):
+        return {"size": len(self._d), "capacity": self.capacity, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "expired": self.expired}
+
 class Flooding:
-    def __init__(self, node_id):
+    def __init__(self, node_id, capacity:int=65536, ttl:float=120.0):
         self.node_id = node_id
-        # cache to avoid loops: (msg_id)->ttl_seen
-        self.seen = set()
+        # cache to avoid loops: ids vistos (acotado por capacidad y TTL)
+        self.seen = SeenCache(capacity, ttl)
 
     def should_forward(self, msg_id:str) -> bool:
-        if msg_id in self.seen:
-            return False
-        self.seen.add(msg_id)
-        return True
+        return not self.seen.check_and_add(msg_id)
 
     def next_hops(self, neighbors, _dest):
         # flooding: send to all neighbors
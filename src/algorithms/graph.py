@@ -0,0 +1,69 @@
+import heapq
+from typing import Dict, List, Tuple
+
+INF = float('inf')
+
+class IndexedGraph:
+    """
+    Grafo dirigido compacto: los ids de nodo se internan a enteros y la
+    adyacencia es una lista indexada (adj[i] = {j: w}). set_edge/del_edge son
+    O(1); spf() trabaja solo con enteros y devuelve arreglos dist/prev.
+    """
+    def __init__(self):
+        self.ids: List[str] = []          # idx -> id
+        self.index: Dict[str, int] = {}   # id -> idx
+        self.adj: List[Dict[int, int]] = []
+        self.indeg: List[int] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def intern(self, u:str) -> int:
+        i = self.index.get(u)
+        if i is None:
+            i = len(self.ids)
+            self.index[u] = i
+            self.ids.append(u)
+            self.adj.append({})
+            self.indeg.append(0)
+        return i
+
+    def set_edge(self, u:str, v:str, w:int):
+        i, j = self.intern(u), self.intern(v)
+        if j not in self.adj[i]:
+            self.indeg[j] += 1
+        self.adj[i][j] = w
+
+    def del_edge(self, u:str, v:str):
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None or j not in self.adj[i]:
+            return
+        del self.adj[i][j]
+        self.indeg[j] -= 1
+
+    def live(self, i:int) -> bool:
+        """El nodo tiene alguna arista (entrante o saliente)."""
+        return bool(self.adj[i]) or self.indeg[i] > 0
+
+    def spf(self, src:str) -> Tuple[List[float], List[int]]:
+        """Dijkstra con heap desde src. prev[i] = -1 si no hay predecesor."""
+        n = len(self.ids)
+        dist = [INF] * n
+        prev = [-1] * n
+        s = self.index.get(src)
+        if s is None:
+            return dist, prev
+        adj = self.adj
+        dist[s] = 0
+        pq = [(0, s)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d != dist[u]:
+                continue
+            for v, w in adj[u].items():
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(pq, (nd, v))
+        return dist, prev
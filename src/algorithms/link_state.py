@@ -1,41 +1,140 @@
-from typing import Dict, Any
-from .dijkstra import dijkstra
+from typing import Dict, Any, List, Optional, Tuple
+from .spf import IncrementalSPF
+
+# números de secuencia de 32 bits comparados con aritmética serial (RFC 1982):
+# a es más nuevo que b si está "adelante" por menos de media vuelta
+SEQ_MOD = 2 ** 32
+
+def seq_newer(a:int, b:int) -> bool:
+    d = (a - b) % SEQ_MOD
+    return 0 < d < SEQ_MOD // 2
 
 class LinkState:
-    def __init__(self, node_id):
+    """
+    LSDB + SPF. Cada LSP lleva `age` (vida restante en segundos, fijada por quien
+    lo origina); al recibirlo se guarda su vencimiento y age_out() lo purga si el
+    origen deja de refrescarlo. Con tiempos en segundos de `now` (ver core.utils.now_ms).
+    """
+    def __init__(self, node_id, max_age:float=600.0, refresh:float=180.0,
+                 ecmp_paths:int=1, ecmp_tolerance:float=0.0):
         self.node_id = node_id
         self.seq = 0
-        # database of LSPs: lspdb[src] = {"seq": int, "links": {neigh:cost,...}}
+        self.max_age = max_age
+        self.refresh = refresh
+        # multipath: hasta ecmp_paths siguientes saltos por destino (1 = un solo camino)
+        self.ecmp_paths = ecmp_paths
+        self.ecmp_tolerance = ecmp_tolerance
+        # database of LSPs: lspdb[src] = {"seq": int, "links": {neigh:cost,...}, "expires": float}
         self.lspdb: Dict[str, Dict[str, Any]] = {}
+        # SPT persistente; los cambios de aristas se acumulan hasta compute_spf
+        self.spf = IncrementalSPF(node_id)
+        self._pending: Dict[Tuple[str,str], Optional[float]] = {}
+        self._originated: Optional[Dict[str,int]] = None  # enlaces del último LSP propio
+        self._originated_at = 0.0
+        self.own_stale = False  # llegó un LSP propio con seq mayor (reinicio): hay que re-originar
 
     def build_lsp(self, local_links: Dict[str,int]) -> Dict[str, Any]:
-        self.seq += 1
-        return {"src": self.node_id, "seq": self.seq, "links": dict(local_links)}
+        self.seq = self.seq % (SEQ_MOD - 1) + 1  # 1..2^32-1; 0 queda para "nunca originado"
+        return {"src": self.node_id, "seq": self.seq, "age": self.max_age, "links": dict(local_links)}
+
+    def needs_origination(self, local_links: Dict[str,int], now:float) -> bool:
+        """Solo si cambiaron los enlaces propios o toca el refresco periódico."""
+        return (self.own_stale or self._originated != local_links
+                or now - self._originated_at >= self.refresh)
 
-    def ingest_lsp(self, lsp: Dict[str,Any]) -> bool:
+    def originate(self, local_links: Dict[str,int], now:float) -> Dict[str, Any]:
+        lsp = self.build_lsp(local_links)
+        self.own_stale = False
+        self._originated = dict(local_links)
+        self._originated_at = now
+        self.ingest_lsp(lsp, now)
+        return lsp
+
+    def ingest_lsp(self, lsp: Dict[str,Any], now:float=0.0) -> bool:
+        """True si el LSP es nuevo (hay que reenviarlo); las aristas cambiadas quedan pendientes para el SPF."""
         src = lsp["src"]; seq = lsp["seq"]
         cur = self.lspdb.get(src)
-        if cur is None or seq > cur["seq"]:
-            self.lspdb[src] = {"seq": seq, "links": dict(lsp["links"])}
-            return True
-        return False
+        if cur is not None and not seq_newer(seq, cur["seq"]):
+            return False
+        if src == self.node_id and seq_newer(seq, self.seq):
+            # copia de una vida anterior de este nodo: saltar por encima de su seq
+            self.seq = seq
+            self.own_stale = True
+            return False
+        old_links = cur["links"] if cur else {}
+        links = lsp["links"]
+        self.lspdb[src] = {"seq": seq, "links": dict(links), "expires": now + lsp.get("age", self.max_age)}
+        if old_links != links:
+            for m in set(old_links) | set(links):
+                if old_links.get(m) != links.get(m):
+                    self._pending[(src, m) if src < m else (m, src)] = None
+        return True
+
+    def age_out(self, now:float) -> List[str]:
+        """Purga los LSPs vencidos (salvo el propio) y devuelve sus orígenes."""
+        dead = [s for s, rec in self.lspdb.items() if rec["expires"] <= now and s != self.node_id]
+        for s in dead:
+            for m in self.lspdb.pop(s)["links"]:
+                self._pending[(s, m) if s < m else (m, s)] = None
+        return dead
+
+    # ---------- sincronización de la LSDB (descripción de la base) ----------
+    def summary(self) -> Dict[str, int]:
+        """{origen: seq} de todo lo que hay en la LSDB."""
+        return {src: rec["seq"] for src, rec in self.lspdb.items()}
+
+    def diff(self, summary: Dict[str, int]) -> Tuple[List[str], List[str]]:
+        """
+        Contra el resumen de un vecino: (orígenes que él no tiene o tiene más viejos,
+        orígenes que faltan aquí o que él tiene más nuevos).
+        """
+        push = [s for s, rec in self.lspdb.items() if s not in summary or seq_newer(rec["seq"], summary[s])]
+        want = [s for s, seq in summary.items() if s not in self.lspdb or seq_newer(seq, self.lspdb[s]["seq"])]
+        return push, want
+
+    def export(self, srcs, now:float) -> List[Dict[str, Any]]:
+        """LSPs guardados, con la vida que les queda, listos para reenviar."""
+        out = []
+        for s in srcs:
+            rec = self.lspdb.get(s)
+            if rec is not None:
+                out.append({"src": s, "seq": rec["seq"], "age": max(0.0, rec["expires"] - now),
+                            "links": dict(rec["links"])})
+        return out
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def _edge_weight(self, a:str, b:str) -> Optional[float]:
+        # arista no dirigida: el menor costo anunciado por cualquiera de los extremos
+        ws = []
+        for x, y in ((a, b), (b, a)):
+            rec = self.lspdb.get(x)
+            if rec is not None and y in rec["links"]:
+                ws.append(rec["links"][y])
+        return min(ws) if ws else None
 
     def compute_spf(self):
-        # Build graph
-        graph = {}
-        for n, rec in self.lspdb.items():
-            graph.setdefault(n, {})
-            for m,w in rec["links"].items():
-                graph.setdefault(m, {})
-                graph[n][m] = w
-                graph[m][n] = w
-        if self.node_id not in graph:
-            graph[self.node_id] = {}
-        dist, nexthop = dijkstra(graph, self.node_id)
-        # build table like DVR
+        if self._pending:
+            changes = [(a, b, self._edge_weight(a, b)) for a, b in self._pending]
+            self._pending.clear()
+            self.spf.update(changes)
+        # build table like DVR ("nexts": todos los siguientes saltos, el primero es "next")
         table = {}
-        for d,c in dist.items():
-            if d == self.node_id or c == float('inf'): 
+        if self.ecmp_paths > 1:
+            sets = self.spf.next_hop_sets(self.ecmp_tolerance, self.ecmp_paths)
+            for d, hops in sets.items():
+                table[d] = {"cost": self.spf.dist[d], "next": hops[0], "nexts": list(hops)}
+            if len(table) < len(self.spf.dist) - 1:
+                # destinos sin conjunto ECMP (enlaces de peso 0): el primer salto del árbol
+                for d, h in self.spf.first_hops().items():
+                    if d not in table:
+                        table[d] = {"cost": self.spf.dist[d], "next": h, "nexts": [h]}
+            return table
+        first = self.spf.first_hops()
+        for d,c in self.spf.dist.items():
+            if d == self.node_id:
                 continue
-            table[d] = {"cost": c, "next": nexthop.get(d)}
+            table[d] = {"cost": c, "next": first.get(d)}
         return table
@@ -0,0 +1,32 @@
+from typing import Optional
+
+class RttEstimator:
+    """
+    RTT suavizado de un vecino (SRTT/RTTVAR como en TCP, RFC 6298) y costo del
+    enlace derivado con histéresis: el costo (SRTT/2, redondeado a múltiplos de
+    `band`) solo se cambia si se aleja del vigente al menos `threshold` (relativo)
+    y más que el ruido medido (RTTVAR/2).
+    """
+    def __init__(self, alpha:float=0.125, beta:float=0.25, threshold:float=0.25, band:int=1):
+        self.alpha = alpha
+        self.beta = beta
+        self.threshold = threshold
+        self.band = max(1, int(band))
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.cost: Optional[int] = None
+
+    def sample(self, rtt:float) -> Optional[int]:
+        """Agrega una medición; devuelve el costo nuevo si cambió, o None."""
+        if self.srtt is None:
+            self.srtt, self.rttvar = float(rtt), rtt / 2.0
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        cand = max(1, self.band * round(self.srtt / 2 / self.band))
+        if self.cost is not None:
+            d = abs(cand - self.cost)
+            if d == 0 or d < self.threshold * self.cost or d <= self.rttvar / 2:
+                return None
+        self.cost = cand
+        return cand
@@ -0,0 +1,211 @@
+import heapq
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+INF = float('inf')
+
+def next_hop_sets(adj:Dict[str, Dict[str, float]], dist:Dict[str, float], source:str,
+                  tolerance:float=0.0, max_paths:int=4) -> Dict[str, Tuple[str, ...]]:
+    """
+    Siguientes saltos de costo minimo (ECMP) por destino, ordenados por costo y
+    luego por id, a lo sumo `max_paths`. Con tolerance > 0 tambien entran los de
+    costo hasta dist*(1+tolerance), pero solo si el vecino esta mas cerca del
+    destino que source (costo_via - w(source, vecino) < dist): asi no hay lazos.
+    Recorre el DAG de distancias (cada paso se aleja de source): O(E * vecinos de source).
+    Con aristas de peso 0 un destino puede quedar sin conjunto (no aparece en el
+    resultado); quien llama usa el primer salto del arbol para esos.
+    """
+    via: Dict[str, Dict[str, float]] = {}  # destino -> {primer salto: costo del camino}
+    out: Dict[str, Tuple[str, ...]] = {}
+    for x in sorted((x for x, d in dist.items() if x != source and d < INF), key=dist.__getitem__):
+        dx = dist[x]
+        limit = dx * (1 + tolerance) + 1e-9
+        best: Dict[str, float] = {}
+        for p, w in adj.get(x, {}).items():
+            dp = dist.get(p, INF)
+            # a igual distancia solo por una arista de peso 0 desde uno ya recorrido
+            if dp > dx or (dp == dx and not (w == 0 and (p == source or p in via))):
+                continue
+            cand = {x: 0.0} if p == source else via.get(p, {})
+            for h, c in cand.items():
+                c += w
+                if c <= limit and c < best.get(h, INF):
+                    best[h] = c
+        if tolerance > 0:
+            own = adj.get(source, {})
+            best = {h: c for h, c in best.items() if c <= dx + 1e-9 or c - own.get(h, 0) < dx}
+        via[x] = best
+        if best:
+            out[x] = tuple(sorted(best, key=lambda h: (best[h], h))[:max_paths])
+    return out
+
+class IncrementalSPF:
+    """
+    Arbol de caminos minimos desde `source` sobre un grafo no dirigido que se
+    mantiene entre cambios. update() aplica cambios de aristas y repara solo la
+    parte afectada:
+      - arista que sube / desaparece y es del arbol -> se invalida el subarbol
+        del hijo y se re-siembra desde sus vecinos no afectados;
+      - arista que baja / aparece -> se relaja desde sus extremos.
+    Si el subarbol invalidado es mas de `full_fraction` del arbol, se hace un
+    Dijkstra completo.
+    """
+    def __init__(self, source:str, full_fraction:float=0.5):
+        self.source = source
+        self.full_fraction = full_fraction
+        self.adj: Dict[str, Dict[str, float]] = {source: {}}
+        self.dist: Dict[str, float] = {source: 0}
+        self.parent: Dict[str, Optional[str]] = {source: None}
+        self.children: Dict[str, Set[str]] = {source: set()}
+        self.full_runs = 0
+        self.incremental_runs = 0
+
+    def weight(self, u:str, v:str) -> Optional[float]:
+        return self.adj.get(u, {}).get(v)
+
+    # ---------- cambios ----------
+    def update(self, changes:Iterable[Tuple[str, str, Optional[float]]]) -> bool:
+        """changes: (u, v, w) con w=None para borrar. Devuelve True si el grafo cambio."""
+        # la misma arista varias veces en un lote: vale el último peso
+        last: Dict[Tuple[str, str], Optional[float]] = {}
+        for u, v, w in changes:
+            if u != v:
+                last[(u, v) if u < v else (v, u)] = w
+        inc, dec = [], []
+        for (u, v), w in last.items():
+            old = self.weight(u, v)
+            if old == w:
+                continue
+            if w is None:
+                self._unlink(u, v)
+            else:
+                self.adj.setdefault(u, {})[v] = w
+                self.adj.setdefault(v, {})[u] = w
+            if old is None or (w is not None and w < old):
+                dec.append((u, v, w))
+            else:
+                inc.append((u, v))
+        if not inc and not dec:
+            return False
+        self._repair(inc, dec)
+        return True
+
+    def _unlink(self, u:str, v:str):
+        for a, b in ((u, v), (v, u)):
+            nbrs = self.adj.get(a)
+            if nbrs is None:
+                continue
+            nbrs.pop(b, None)
+            if not nbrs and a != self.source:
+                del self.adj[a]
+
+    def _set_parent(self, x:str, p:Optional[str]):
+        old = self.parent.get(x)
+        if old is not None and old in self.children:
+            self.children[old].discard(x)
+        self.parent[x] = p
+        if p is not None:
+            self.children.setdefault(p, set()).add(x)
+
+    def _subtree(self, root:str) -> Set[str]:
+        out, stack = set(), [root]
+        while stack:
+            x = stack.pop()
+            if x in out:
+                continue
+            out.add(x)
+            stack.extend(self.children.get(x, ()))
+        return out
+
+    def _repair(self, inc, dec):
+        affected: Set[str] = set()
+        for u, v in inc:
+            if self.parent.get(v) == u:
+                child = v
+            elif self.parent.get(u) == v:
+                child = u
+            else:
+                continue  # arista fuera del arbol: no cambia ninguna distancia
+            if child not in affected:
+                affected |= self._subtree(child)
+
+        reachable = sum(1 for d in self.dist.values() if d < INF)
+        if len(affected) > self.full_fraction * max(1, reachable):
+            self.full()
+            return
+        self.incremental_runs += 1
+
+        for x in affected:
+            self.dist[x] = INF
+            self._set_parent(x, None)
+        pq = []
+        # re-siembra: mejor entrada desde un vecino no afectado
+        for x in affected:
+            best, via = INF, None
+            for y, w in self.adj.get(x, {}).items():
+                if y in affected:
+                    continue
+                nd = self.dist.get(y, INF) + w
+                if nd < best:
+                    best, via = nd, y
+            if via is not None:
+                self.dist[x] = best
+                self._set_parent(x, via)
+                heapq.heappush(pq, (best, x))
+        for u, v, w in dec:
+            for a, b in ((u, v), (v, u)):
+                nd = self.dist.get(a, INF) + w
+                if nd < self.dist.get(b, INF):
+                    self.dist[b] = nd
+                    self._set_parent(b, a)
+                    heapq.heappush(pq, (nd, b))
+        self._relax(pq)
+        self._prune()
+
+    def _relax(self, pq):
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d != self.dist.get(u):
+                continue
+            for v, w in self.adj.get(u, {}).items():
+                nd = d + w
+                if nd < self.dist.get(v, INF):
+                    self.dist[v] = nd
+                    self._set_parent(v, u)
+                    heapq.heappush(pq, (nd, v))
+
+    def _prune(self):
+        # nodos que ya no estan en el grafo o quedaron inalcanzables
+        for x in [x for x, d in self.dist.items() if d == INF or x not in self.adj]:
+            if x == self.source:
+                continue
+            self._set_parent(x, None)
+            del self.dist[x]
+            del self.parent[x]
+            self.children.pop(x, None)
+
+    def full(self):
+        self.full_runs += 1
+        self.dist = {self.source: 0}
+        self.parent = {self.source: None}
+        self.children = {self.source: set()}
+        self._relax([(0, self.source)])
+
+    # ---------- lectura ----------
+    def next_hop_sets(self, tolerance:float=0.0, max_paths:int=4) -> Dict[str, Tuple[str, ...]]:
+        return next_hop_sets(self.adj, self.dist, self.source, tolerance, max_paths)
+
+    def first_hops(self) -> Dict[str, str]:
+        first: Dict[str, str] = {}
+        for x in self.dist:
+            if x == self.source:
+                continue
+            chain = []
+            u = x
+            while u not in first and self.parent.get(u) not in (None, self.source):
+                chain.append(u)
+                u = self.parent[u]
+            hop = first.get(u, u)
+            first[u] = hop
+            for c in chain:
+                first[c] = hop
+        return first
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+class KeyedDispatcher:
+    """
+    Pool de `workers` colas, cada una con su propio worker. Todo lo que se envía
+    con la misma clave cae en la misma cola, así que se procesa en orden; claves
+    distintas avanzan en paralelo. Las colas son acotadas (maxsize): submit()
+    espera si la cola destino está llena.
+    """
+    def __init__(self, handler:Callable[[Any], Awaitable[None]], workers:int=4, maxsize:int=1024,
+                 on_error:Optional[Callable[[Exception], None]]=None):
+        self.handler = handler
+        self.on_error = on_error
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=maxsize) for _ in range(max(1, workers))]
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._worker(q)) for q in self.queues]
+
+    async def submit(self, key:Hashable, item:Any):
+        await self.queues[hash(key) % len(self.queues)].put(item)
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self.queues)
+
+    async def _worker(self, q:asyncio.Queue):
+        while True:
+            item = await q.get()
+            try:
+                await self.handler(item)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            finally:
+                q.task_done()
+
+    async def close(self, drain:bool=True):
+        """Con drain, espera a que se procese lo ya encolado antes de cortar los workers."""
+        if drain and self.tasks:
+            await asyncio.gather(*(q.join() for q in self.queues))
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
@@ -0,0 +1,121 @@
+import asyncio
+from typing import Dict, List, Optional, Sequence, Set
+from .transport import redis, LoopbackBus, LoopbackTransport, Data, Item
+from .utils import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD
+from .log import get_logger
+
+_log = get_logger("hub")
+
+class RedisHub(LoopbackBus):
+    """
+    Varios nodos en un mismo proceso compartiendo un cliente Redis (un pool de
+    conexiones) y una sola suscripción pub/sub que reparte cada mensaje a los
+    transportes locales suscritos a ese canal.
+
+    Publicar a un canal de un nodo co-alojado (owner) se entrega en memoria y no
+    pasa por Redis; cualquier otro canal va por Redis y vuelve por la suscripción
+    compartida si algún nodo local lo escucha. `owner` solo vale para canales que
+    escucha únicamente su dueño (Node): un proceso remoto suscrito a un canal owner
+    no vería lo que se publica desde aquí. Sec30Node escucha también los canales de
+    sus vecinos, así que se aloja sin owner y todo su tráfico pasa por Redis.
+    """
+    def __init__(self, host:str=REDIS_HOST, port:int=REDIS_PORT, password:Optional[str]=REDIS_PASSWORD):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError("RedisHub requiere el paquete 'redis' (pip install -r requirements.txt)")
+        self.host, self.port = host, port
+        self.r = redis.Redis(host=host, port=port, password=password)
+        self.pubsub = self.r.pubsub()
+        self.owned: Set[str] = set()        # canales de nodos alojados aquí
+        self._remote_subs: Set[str] = set() # canales ya suscritos en Redis
+        self._reader: Optional[asyncio.Task] = None
+        self.local_sent = 0
+        self.remote_sent = 0
+        self.received = 0
+
+    def transport(self, owner:Optional[str]=None) -> "HubTransport":
+        if owner is not None:
+            self.owned.add(owner)
+        return HubTransport(self)
+
+    async def ensure_subscribed(self, channels:Sequence[str]):
+        new = [ch for ch in channels if ch not in self._remote_subs]
+        if new:
+            self._remote_subs.update(new)
+            await self.pubsub.subscribe(*new)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        while True:
+            try:
+                async for raw in self.pubsub.listen():
+                    if raw.get("type") not in ("message", "pmessage"):
+                        continue
+                    ch = raw["channel"]
+                    if isinstance(ch, bytes):
+                        ch = ch.decode()
+                    self.received += 1
+                    self.deliver(ch, raw["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _log.warning("recv error: %s", e, event="error")
+                await asyncio.sleep(0.2)
+
+    async def publish(self, channel:str, data:Data) -> int:
+        if channel in self.owned:
+            self.local_sent += 1
+            return self.deliver(channel, data)
+        self.remote_sent += 1
+        return await self.r.publish(channel, data)
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        n = 0
+        remote: List[Item] = []
+        for ch, d in items:
+            if ch in self.owned:
+                self.local_sent += 1
+                n += self.deliver(ch, d)
+            else:
+                remote.append((ch, d))
+        if len(remote) == 1:
+            n += await self.publish(*remote[0])
+        elif remote:
+            self.remote_sent += len(remote)
+            async with self.r.pipeline(transaction=False) as pipe:
+                for ch, d in remote:
+                    pipe.publish(ch, d)
+                n += sum(await pipe.execute())
+        return n
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self.pubsub.close()
+        await self.r.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        return {"local_sent": self.local_sent, "remote_sent": self.remote_sent, "received": self.received,
+                "channels": len(self._remote_subs), "owned": len(self.owned)}
+
+
+class HubTransport(LoopbackTransport):
+    """Transporte de un nodo alojado en un RedisHub (cola propia, conexiones compartidas)."""
+    def __init__(self, hub:RedisHub):
+        super().__init__(hub)
+        self.hub = hub
+
+    async def subscribe(self, *channels:str):
+        await super().subscribe(*channels)
+        await self.hub.ensure_subscribed(channels)
+
+    async def publish(self, channel:str, data:Data) -> int:
+        return await self.hub.publish(channel, data)
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        return await self.hub.publish_many(items)
+
+    def describe(self) -> str:
+        return f"hub redis={self.hub.host}:{self.hub.port}"
@@ -0,0 +1,120 @@
+import atexit, logging, logging.handlers, queue, sys
+from typing import Callable, Dict, List, Optional, Tuple
+from . import utils
+from .utils import LOG_LEVEL, LOG_RATE, LOG_BURST, pretty_table
+
+ROOT = "node"
+logging.getLogger(ROOT).addHandler(logging.NullHandler())  # sin setup_logging() no se imprime nada
+
+def _now() -> float:
+    return utils._clock()  # reloj virtual en el simulador
+
+class RateLimit(logging.Filter):
+    """
+    Token bucket por (nodo, evento): `rate` registros/s con ráfagas de hasta
+    `burst`. Los registros sin `event` pasan siempre. Lo descartado se cuenta y
+    se informa en el siguiente registro de ese evento que pasa.
+    """
+    def __init__(self, rate:float=LOG_RATE, burst:int=LOG_BURST, clock:Callable[[], float]=_now):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.buckets: Dict[Tuple[str, str], List[float]] = {}  # clave -> [tokens, t_ultimo, suprimidos]
+
+    def filter(self, record:logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or self.rate <= 0:
+            return True
+        key = (getattr(record, "node", ""), event)
+        now = self.clock()
+        b = self.buckets.get(key)
+        if b is None:
+            b = self.buckets[key] = [float(self.burst), now, 0]
+        else:
+            b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+            b[1] = now
+        if b[0] < 1:
+            b[2] += 1
+            return False
+        b[0] -= 1
+        if b[2]:
+            record.suppressed, b[2] = b[2], 0
+        return True
+
+
+class _Formatter(logging.Formatter):
+    def format(self, record:logging.LogRecord) -> str:
+        s = super().format(record)
+        n = getattr(record, "suppressed", 0)
+        return f"{s} (+{n} suprimidos)" if n else s
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # no formatea en el hilo del event loop: el listener lo hace al escribir
+    # (los args deben ser inmutables o copias, p. ej. Table)
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class Table:
+    """Tabla de ruteo que se formatea (pretty_table) recién al escribirse el log."""
+    __slots__ = ("table",)
+    def __init__(self, table:Dict[str, dict]):
+        self.table = table
+
+    def __str__(self) -> str:
+        return pretty_table(self.table)
+
+
+class NodeLogger:
+    """Logger de un nodo: agrega `node` y `event` (clave del límite de tasa) a cada registro."""
+    __slots__ = ("logger", "node")
+    def __init__(self, node:str):
+        self.logger = logging.getLogger(ROOT)
+        self.node = node
+
+    def _log(self, level:int, msg:str, args, event:Optional[str]):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args, extra={"node": self.node, "event": event})
+
+    def debug(self, msg:str, *args, event:Optional[str]=None):
+        self._log(logging.DEBUG, msg, args, event)
+
+    def info(self, msg:str, *args, event:Optional[str]=None):
+        self._log(logging.INFO, msg, args, event)
+
+    def warning(self, msg:str, *args, event:Optional[str]=None):
+        self._log(logging.WARNING, msg, args, event)
+
+    def error(self, msg:str, *args, event:Optional[str]=None):
+        self._log(logging.ERROR, msg, args, event)
+
+
+def get_logger(node:str) -> NodeLogger:
+    return NodeLogger(node)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level:str=LOG_LEVEL, stream=None, rate:float=LOG_RATE, burst:int=LOG_BURST):
+    """
+    Salida de los nodos: el event loop solo encola el registro (QueueHandler,
+    filtrado por nivel y RateLimit); un hilo (QueueListener) lo formatea y lo
+    escribe en `stream` (stdout por defecto). Idempotente.
+    """
+    global _listener
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(level)
+    if _listener is not None:
+        return _listener
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    qh = _DeferredQueueHandler(q)
+    qh.addFilter(RateLimit(rate, burst))
+    logger.addHandler(qh)
+    logger.propagate = False
+    out = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    out.setFormatter(_Formatter("[%(node)s] %(message)s"))
+    _listener = logging.handlers.QueueListener(q, out)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
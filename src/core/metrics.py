@@ -0,0 +1,211 @@
+import asyncio, bisect, json, time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# buckets por defecto en milisegundos
+MS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+class Counter:
+    __slots__ = ("value",)
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n:float=1):
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ("value", "fn")
+    def __init__(self, fn:Optional[Callable[[], float]]=None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, v:float):
+        self.value = v
+
+    def get(self) -> float:
+        return self.fn() if self.fn is not None else self.value
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+    def __init__(self, buckets:Sequence[float]=MS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v:float):
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def time_ms(self):
+        return _Timer(self)
+
+    def quantile(self, q:float) -> Optional[float]:
+        """Cota superior del bucket donde cae el cuantil q."""
+        if not self.count:
+            return None
+        target, acc = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+class _Timer:
+    __slots__ = ("h", "t0")
+    def __init__(self, h:Histogram):
+        self.h = h
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe((time.perf_counter() - self.t0) * 1000.0)
+
+
+class Registry:
+    """
+    Métricas por (nombre, etiquetas). counter()/gauge()/histogram() devuelven la
+    serie existente o la crean, así que se pueden llamar en el camino caliente.
+    """
+    def __init__(self):
+        self.series: Dict[Tuple[str, Labels], object] = {}
+        self.help: Dict[str, str] = {}
+
+    def _get(self, cls, name:str, labels:Dict[str, str], factory):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = factory()
+        elif not isinstance(s, cls):
+            raise TypeError(f"{name} ya existe como {type(s).__name__}")
+        return s
+
+    def describe(self, name:str, text:str):
+        self.help[name] = text
+
+    def counter(self, name:str, **labels) -> Counter:
+        return self._get(Counter, name, labels, Counter)
+
+    def gauge(self, name:str, fn:Optional[Callable[[], float]]=None, **labels) -> Gauge:
+        g = self._get(Gauge, name, labels, lambda: Gauge(fn))
+        if fn is not None:
+            g.fn = fn
+        return g
+
+    def histogram(self, name:str, buckets:Sequence[float]=MS_BUCKETS, **labels) -> Histogram:
+        return self._get(Histogram, name, labels, lambda: Histogram(buckets))
+
+    # ---------- exposición ----------
+    def snapshot(self) -> Dict[str, List[dict]]:
+        out: Dict[str, List[dict]] = {}
+        for (name, labels), s in sorted(self.series.items(), key=lambda kv: kv[0]):
+            row = {"labels": dict(labels)}
+            if isinstance(s, Histogram):
+                row.update(count=s.count, sum=round(s.sum, 3), p50=s.quantile(0.5), p99=s.quantile(0.99),
+                           buckets=dict(zip([str(b) for b in s.buckets] + ["+Inf"], s.counts)))
+            elif isinstance(s, Gauge):
+                row["value"] = s.get()
+            else:
+                row["value"] = s.value
+            out.setdefault(name, []).append(row)
+        return out
+
+    def render_text(self) -> str:
+        """Formato de texto de Prometheus."""
+        lines, typed = [], set()
+        def fmt(labels):
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+        for (name, labels), s in sorted(self.series.items(), key=lambda kv: kv[0]):
+            kind = "histogram" if isinstance(s, Histogram) else "gauge" if isinstance(s, Gauge) else "counter"
+            if name not in typed:
+                typed.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+            if isinstance(s, Histogram):
+                acc = 0
+                for b, c in zip(list(s.buckets) + ["+Inf"], s.counts):
+                    acc += c
+                    lines.append(f"{name}_bucket{fmt(labels + (('le', str(b)),))} {acc}")
+                lines.append(f"{name}_sum{fmt(labels)} {s.sum}")
+                lines.append(f"{name}_count{fmt(labels)} {s.count}")
+            else:
+                lines.append(f"{name}{fmt(labels)} {s.get() if isinstance(s, Gauge) else s.value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()  # registro del proceso (todos los nodos alojados en él)
+
+class MessageCounters:
+    """
+    messages_total{node,event,type} con los contadores ya resueltos en un dict
+    local; event: in | out | dropped | duplicate | ttl_expired.
+    """
+    def __init__(self, registry:Registry, node:str):
+        self.registry = registry
+        self.node = node
+        self._c: Dict[Tuple[str, str], Counter] = {}
+
+    def inc(self, event:str, mtype, n:int=1):
+        c = self._c.get((event, mtype))
+        if c is None:
+            c = self._c[(event, mtype)] = self.registry.counter("messages_total", node=self.node,
+                                                               event=event, type=mtype or "-")
+        c.value += n
+
+REGISTRY.describe("messages_total", "Mensajes por nodo, evento (in/out/dropped/duplicate/ttl_expired) y tipo")
+REGISTRY.describe("publish_latency_ms", "Duración de cada publish_many del Outbox")
+REGISTRY.describe("hello_rtt_ms", "RTT hello/echo por vecino")
+REGISTRY.describe("recompute_ms", "Duración del recálculo de tablas (SPF / vector de distancias)")
+REGISTRY.describe("route_changes_total", "Destinos cuyo siguiente salto (o costo, en sec30) cambió")
+REGISTRY.describe("queue_depth", "Mensajes en espera por cola")
+REGISTRY.describe("flood_seen", "Caché de ids vistos del flooding: size, hits, misses, evictions, expired")
+REGISTRY.describe("fib_generation", "Generación de la tabla de reenvío instalada (sube en cada cambio)")
+
+# ---------- exportadores ----------
+async def serve(registry:Registry, host:str="127.0.0.1", port:int=9100):
+    """HTTP mínimo: GET /metrics (texto Prometheus) y GET /metrics.json."""
+    async def handle(reader, writer):
+        try:
+            req = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = req.split()[1].decode() if len(req.split()) > 1 else "/"
+            if path.startswith("/metrics.json"):
+                body, ctype = json.dumps(registry.snapshot()).encode(), "application/json"
+            else:
+                body, ctype = registry.render_text().encode(), "text/plain; version=0.0.4"
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: " + ctype.encode()
+                         + b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+        finally:
+            writer.close()
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+async def dump_loop(registry:Registry, path:str, interval:float=10.0):
+    """Escribe snapshot() como JSON en `path` cada `interval` segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"ts": time.time(), "metrics": registry.snapshot()}, f)
+
+def add_metrics_args(ap):
+    ap.add_argument("--metrics-port", type=int, default=None, help="Servir métricas en http://127.0.0.1:PORT/metrics")
+    ap.add_argument("--metrics-dump", default=None, help="Archivo JSON con las métricas, reescrito periódicamente")
+    ap.add_argument("--metrics-interval", type=float, default=10.0)
+
+def start_exporters(args, registry:Registry=REGISTRY):
+    """Lanza los exportadores pedidos por línea de comandos (dentro de un loop corriendo)."""
+    if args.metrics_port:
+        asyncio.ensure_future(serve(registry, port=args.metrics_port))
+    if args.metrics_dump:
+        asyncio.ensure_future(dump_loop(registry, args.metrics_dump, args.metrics_interval))
@@ -1,10 +1,188 @@
-import json
-from typing import Dict, Any
+import json, struct, zlib
+from typing import Dict, Any, Iterable, Optional, Union
+from .utils import WIRE_CODEC
 
 def encode(msg: Dict[str, Any]) -> str:
     return json.dumps(msg, separators=(',',':'))
 
 def decode(raw: bytes) -> Dict[str, Any]:
+    if isinstance(raw, (bytes, bytearray)) and raw[:1] == _MAGIC_B:
+        return _DEFAULT.decode(raw)
     if isinstance(raw, bytes):
         raw = raw.decode()
     return json.loads(raw)
+
+# ---------- codec binario ----------
+# [cabecera fija][hash de la tabla?][from inline?][to inline?][resto en JSON compacto?]
+# cabecera: magic, flags, proto, type, ttl, hops, from, to  (from/to = indice en la tabla de ids)
+# con F_TABLE sigue el hash de 2 bytes de la tabla de quien codifico
+MAGIC = 0xB1
+_MAGIC_B = bytes([MAGIC])
+_HDR = struct.Struct("!BBBBhhHH")
+_TABLE = struct.Struct("!H")
+_INLINE = 0xFFFF
+F_TTL, F_FROM, F_TO, F_REST, F_HOPS, F_NOHEADERS, F_NOPAYLOAD = 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40
+F_TABLE = 0x80
+
+def table_hash(ids) -> int:
+    """Hash corto (16 bits) de la tabla de internado ya ordenada."""
+    return zlib.crc32("\n".join(ids).encode()) & 0xFFFF
+
+PROTOS = ("dijkstra", "flooding", "lsr", "dvr")   # codigo = posicion + 1 (0 = ausente)
+TYPES = ("message", "echo", "info", "hello")
+_PROTO_CODE = {p: i + 1 for i, p in enumerate(PROTOS)}
+_TYPE_CODE = {t: i + 1 for i, t in enumerate(TYPES)}
+_HEADER_KEYS = frozenset(("ttl", "hops", "from", "to"))
+
+def fits_header(msg:Dict[str, Any]) -> bool:
+    """
+    El mensaje entra entero en la cabecera binaria (sin resto JSON). Solo esos se
+    mandan en binario: con resto, armar y parsear los dos formatos cuesta mas CPU
+    que el JSON solo (ver protocol.encode/decode en benchmarks/run.py).
+    """
+    for k, v in msg.items():
+        if k in _HEADER_KEYS:
+            continue
+        if k == "proto" and v in _PROTO_CODE or k == "type" and v in _TYPE_CODE:
+            continue
+        if k == "headers" and v == [] or k == "payload" and v == {}:
+            continue
+        return False
+    return True
+
+class Codec:
+    """
+    Codifica mensajes en JSON (wire="json") o en el formato binario (wire="bin",
+    solo los que entran en la cabecera; el resto sigue en JSON). decode() detecta
+    el formato por el primer byte, asi que nodos con distinto wire conviven en la
+    misma red.
+
+    `ids` es la tabla de internado (ver core.topology.topology_ids): los ids que
+    estan en ella viajan como un entero de 2 bytes. Cada trama binaria lleva el
+    hash de la tabla de quien la codifico y cada hello recibido deja anotado el
+    de su vecino en `peers`. encode(msg, peer) interna los ids solo hacia un
+    vecino con la misma tabla; a uno que todavia no se conoce le van inline (los
+    entiende cualquiera) y a uno con otra tabla, en JSON. Si aun asi llega una
+    trama con ids internados y otra tabla, decode() la rechaza (ValueError).
+    """
+    def __init__(self, ids:Iterable[str]=(), wire:str="json"):
+        if wire not in ("json", "bin"):
+            raise ValueError(f"wire desconocido: {wire}")
+        self.wire = wire
+        self.ids = sorted(set(ids))[:_INLINE]
+        self.index = {n: i for i, n in enumerate(self.ids)}
+        self.table = table_hash(self.ids)
+        self.peers: Dict[str, int] = {}  # vecino -> hash de su tabla (de sus hello)
+
+    def encode(self, msg:Dict[str, Any], peer:Optional[str]=None) -> Union[str, bytes]:
+        """`peer`: vecino que recibe la trama (None = cualquiera: ids inline)."""
+        if self.wire == "json" or not fits_header(msg):
+            return encode(msg)
+        table = self.peers.get(peer) if peer is not None else None
+        if table is not None and table != self.table:
+            return encode(msg)
+        return self.encode_bin(msg, intern=table is not None)
+
+    def decode(self, raw:Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(raw, (bytes, bytearray)) and raw[:1] == _MAGIC_B:
+            return self.decode_bin(raw)
+        return decode(raw)
+
+    def _ref(self, v, intern:bool):
+        # (indice, bytes inline) o None si no cabe en la cabecera
+        i = self.index.get(v) if intern else None
+        if i is not None:
+            return i, b""
+        if isinstance(v, str):
+            b = v.encode()
+            if len(b) <= 255:
+                return _INLINE, bytes((len(b),)) + b
+        return None
+
+    def encode_bin(self, msg:Dict[str, Any], intern:bool=True) -> bytes:
+        rest = dict(msg)
+        flags = 0
+        proto = _PROTO_CODE.get(rest.get("proto"), 0)
+        if proto: del rest["proto"]
+        mtype = _TYPE_CODE.get(rest.get("type"), 0)
+        if mtype: del rest["type"]
+        ttl = rest.get("ttl")
+        if type(ttl) is int and -32768 <= ttl <= 32767:
+            flags |= F_TTL; del rest["ttl"]
+        else:
+            ttl = 0
+        hops = rest.get("hops")
+        if type(hops) is int and -32768 <= hops <= 32767:
+            flags |= F_HOPS; del rest["hops"]
+        else:
+            hops = 0
+        f = self._ref(rest.get("from"), intern)
+        if f is not None:
+            flags |= F_FROM; del rest["from"]
+        else:
+            f = (0, b"")
+        t = self._ref(rest.get("to"), intern)
+        if t is not None:
+            flags |= F_TO; del rest["to"]
+        else:
+            t = (0, b"")
+        # "headers": [] y "payload": {} vacios (lo normal en hello/echo) van como flags
+        if rest.get("headers", 0) == []:
+            flags |= F_NOHEADERS; del rest["headers"]
+        if rest.get("payload", 0) == {}:
+            flags |= F_NOPAYLOAD; del rest["payload"]
+        table = b""
+        if self.ids:
+            flags |= F_TABLE
+            table = _TABLE.pack(self.table)
+        out = _HDR.pack(MAGIC, flags, proto, mtype, ttl, hops, f[0], t[0]) + table + f[1] + t[1]
+        if rest:
+            out = bytes((out[0], flags | F_REST)) + out[2:] + json.dumps(rest, separators=(',',':')).encode()
+        return out
+
+    def _id(self, i:int) -> str:
+        if i >= len(self.ids):
+            raise ValueError(f"id internado {i} fuera de la tabla ({len(self.ids)} ids)")
+        return self.ids[i]
+
+    def decode_bin(self, raw:bytes) -> Dict[str, Any]:
+        _, flags, proto, mtype, ttl, hops, f, t = _HDR.unpack_from(raw)
+        pos = _HDR.size
+        table = None
+        if flags & F_TABLE:
+            (table,) = _TABLE.unpack_from(raw, pos)
+            pos += _TABLE.size
+            if table != self.table and (flags & F_FROM and f != _INLINE or flags & F_TO and t != _INLINE):
+                raise ValueError(f"tabla de ids distinta (hash {table:04x}, local {self.table:04x})")
+        msg: Dict[str, Any] = {}
+        if proto: msg["proto"] = PROTOS[proto - 1]
+        if mtype: msg["type"] = TYPES[mtype - 1]
+        if flags & F_FROM:
+            if f == _INLINE:
+                n = raw[pos]
+                msg["from"] = bytes(raw[pos + 1:pos + 1 + n]).decode()
+                pos += 1 + n
+            else:
+                msg["from"] = self._id(f)
+        if flags & F_TO:
+            if t == _INLINE:
+                n = raw[pos]
+                msg["to"] = bytes(raw[pos + 1:pos + 1 + n]).decode()
+                pos += 1 + n
+            else:
+                msg["to"] = self._id(t)
+        if flags & F_TTL: msg["ttl"] = ttl
+        if flags & F_HOPS: msg["hops"] = hops
+        if flags & F_NOHEADERS: msg["headers"] = []
+        if flags & F_NOPAYLOAD: msg["payload"] = {}
+        if flags & F_REST:
+            msg.update(json.loads(raw[pos:]))
+        if table is not None and msg.get("type") == "hello" and isinstance(msg.get("from"), str):
+            self.peers[msg["from"]] = table
+        return msg
+
+_DEFAULT = Codec()
+
+def make_codec(ids:Iterable[str]=(), wire:Optional[str]=None) -> Codec:
+    """Codec con la tabla `ids` y el formato de envio de WIRE_CODEC (json|bin)."""
+    return Codec(ids, WIRE_CODEC if wire is None else wire)
@@ -0,0 +1,83 @@
+import json, os
+from typing import Any, Dict, Optional, Tuple
+
+class Snapshot:
+    """
+    Estado de un nodo en disco (clave -> valor JSON) para arrancar en caliente.
+
+    El archivo es un log de solo-agregar, una línea JSON por registro:
+    `{"ts": t, "k": clave, "v": valor}` o `{"ts": t, "k": clave, "del": 1}`.
+    checkpoint() agrega solo las claves que cambiaron desde el anterior (o una
+    línea `{"ts": t}` si no cambió nada, para fechar el estado); cuando
+    el log pasa de `compact_ratio` veces las claves vivas se reescribe entero
+    (archivo temporal + rename, nunca queda a medias). Al leer, una última línea
+    cortada (caída a mitad de escritura) se ignora.
+    """
+    def __init__(self, path:str, compact_ratio:float=4.0):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self._written: Dict[str, str] = {}  # clave -> valor serializado ya en el log
+        self._records = 0                   # líneas en el log
+
+    def load(self) -> Tuple[Optional[float], Dict[str, Any]]:
+        """(ts del último checkpoint o None si no hay archivo, estado)."""
+        state: Dict[str, Any] = {}
+        ts = None
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return None, state
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    self._records = float('inf')  # cola truncada: el próximo checkpoint reescribe
+                    break
+                ts = rec.get("ts", ts)
+                self._records += 1
+                if "k" not in rec:
+                    continue
+                if rec.get("del"):
+                    state.pop(rec["k"], None)
+                    self._written.pop(rec["k"], None)
+                else:
+                    state[rec["k"]] = rec["v"]
+                    self._written[rec["k"]] = json.dumps(rec["v"], separators=(',', ':'), sort_keys=True)
+        return ts, state
+
+    def checkpoint(self, state:Dict[str, Any], ts:float) -> int:
+        """Persiste `state` entero (agregando solo la diferencia). Devuelve las líneas escritas."""
+        enc = {k: json.dumps(v, separators=(',', ':'), sort_keys=True) for k, v in state.items()}
+        lines = [f'{{"ts":{ts},"k":{json.dumps(k)},"v":{s}}}\n'
+                 for k, s in enc.items() if self._written.get(k) != s]
+        lines += [f'{{"ts":{ts},"k":{json.dumps(k)},"del":1}}\n' for k in self._written if k not in enc]
+        if not lines:
+            lines = [f'{{"ts":{ts}}}\n']
+        if self._records + len(lines) > self.compact_ratio * max(16, len(enc)):
+            return self._rewrite(enc, ts)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        self._written = enc
+        self._records += len(lines)
+        return len(lines)
+
+    def _rewrite(self, enc:Dict[str, str], ts:float) -> int:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f'{{"ts":{ts}}}\n')
+            f.writelines(f'{{"ts":{ts},"k":{json.dumps(k)},"v":{s}}}\n' for k, s in enc.items())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._written = enc
+        self._records = len(enc) + 1
+        return len(enc) + 1
+
+
+def snapshot_for(directory:str, node_id:str) -> Optional[Snapshot]:
+    """Snapshot del nodo en `directory` (None si está vacío: sin persistencia)."""
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return Snapshot(os.path.join(directory, f"{node_id}.snap"))
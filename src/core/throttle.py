@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Callable, Optional, Set
+
+class Backoff:
+    """
+    Espera antes de correr un trabajo disparado por eventos (SPF, generación de
+    LSP), al estilo spf-throttle: tras un periodo tranquilo espera `start`, el
+    siguiente disparo `hold`, y cada uno después el doble, hasta `maximum`.
+    Sin disparos durante 2*maximum vuelve a `start`.
+    """
+    def __init__(self, start:float, hold:float, maximum:float):
+        self.start, self.hold, self.max = start, hold, maximum
+        self.current: Optional[float] = None  # None = periodo tranquilo
+        self.last = float('-inf')
+
+    def next_delay(self, now:float) -> float:
+        if self.current is None or now - self.last > 2 * self.max:
+            self.current = None
+            delay = self.start
+        elif self.current < self.hold:
+            delay = self.hold
+        else:
+            delay = min(self.max, self.current * 2)
+        self.current = delay
+        self.last = now
+        return delay
+
+
+class Throttled:
+    """
+    trigger() agenda fn() según el Backoff; los disparos mientras hay una
+    ejecución agendada se juntan en esa. fn puede ser una corrutina: corre como
+    tarea, referenciada hasta que termine; cancel() también la cancela.
+    """
+    def __init__(self, fn:Callable[[], Any], backoff:Backoff):
+        self.fn = fn
+        self.backoff = backoff
+        self.runs = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> bool:
+        return self._handle is not None
+
+    def trigger(self):
+        if self._handle is not None:
+            return
+        loop = asyncio.get_event_loop()
+        self._handle = loop.call_later(self.backoff.next_delay(loop.time()), self._run)
+
+    def _run(self):
+        self._handle = None
+        self.runs += 1
+        r = self.fn()
+        if asyncio.iscoroutine(r):
+            task = asyncio.create_task(r)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for t in self._tasks:
+            t.cancel()
@@ -0,0 +1,140 @@
+import bisect, mmap, struct
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+# Topología compilada (src/tools/compile_topology.py), little-endian:
+#   cabecera | ids | nombres (canales, opcional) | índice de adyacencia | adyacencias
+# ids y nombres: (n+1) offsets u32 + los strings utf-8 pegados; ids ordenados (= tabla
+# de internado del codec). Adyacencia del nodo i: entradas [idx[i], idx[i+1]) de
+# (vecino u32, peso i32). Un proceso mapea el archivo y lee solo su fila y la tabla de ids.
+MAGIC = b"TOPO"
+VERSION = 1
+F_NAMES = 0x01
+_HDR = struct.Struct("<4sHHIIIIII")  # magic, versión, flags, n, aristas, off ids/names/idx/adj
+_EDGE = struct.Struct("<Ii")
+
+def _strings(values:Sequence[str]) -> bytes:
+    blobs = [v.encode() for v in values]
+    offs, pos = [], 0
+    for b in blobs:
+        offs.append(pos)
+        pos += len(b)
+    offs.append(pos)
+    return struct.pack(f"<{len(offs)}I", *offs) + b"".join(blobs)
+
+def topology_ids(topo:Dict[str, Dict[str,int]], names:Optional[Iterable[str]]=None) -> List[str]:
+    """
+    Ids de la topología (nodos y vecinos) y del mapa de nombres, ordenados: la tabla
+    de internado del codec. Igual desde el JSON o desde la topología compilada.
+    """
+    ids = set(topo) | set(names or ())
+    for nbrs in topo.values():
+        ids.update(nbrs)
+    return sorted(ids)
+
+def compile_topology(topo:Dict[str, Dict[str,int]], names:Optional[Dict[str,str]]=None) -> bytes:
+    ids = topology_ids(topo, names)
+    index = {n: i for i, n in enumerate(ids)}
+    idx, adj = [0], []
+    for n in ids:
+        for v, w in sorted(topo.get(n, {}).items()):
+            if type(w) is not int:
+                raise ValueError(f"peso no entero {n}->{v}: {w!r}")
+            adj.append(_EDGE.pack(index[v], w))
+        idx.append(len(adj))
+    sec_ids = _strings(ids)
+    sec_names = _strings([names.get(n, "") for n in ids]) if names is not None else b""
+    sec_idx = struct.pack(f"<{len(idx)}I", *idx)
+    off_ids = _HDR.size
+    off_names = off_ids + len(sec_ids)
+    off_idx = off_names + len(sec_names)
+    off_adj = off_idx + len(sec_idx)
+    hdr = _HDR.pack(MAGIC, VERSION, F_NAMES if names is not None else 0, len(ids), len(adj),
+                    off_ids, off_names, off_idx, off_adj)
+    return hdr + sec_ids + sec_names + sec_idx + b"".join(adj)
+
+def is_compiled(path:str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _StringTable(Sequence):
+    """Strings de una sección, decodificados a pedido."""
+    def __init__(self, buf, off:int, n:int):
+        self.buf, self.off, self.n = buf, off, n
+        self.data = off + (n + 1) * 4
+
+    def __len__(self):
+        return self.n
+
+    def all(self):
+        """Toda la tabla de una vez (más rápido que recorrerla de a uno)."""
+        offs = struct.unpack_from(f"<{self.n + 1}I", self.buf, self.off)
+        blob = self.buf[self.data:self.data + offs[-1]]
+        return [str(blob[a:b], "utf-8") for a, b in zip(offs, offs[1:])]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.n))]
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        a, b = struct.unpack_from("<II", self.buf, self.off + 4 * i)
+        return str(self.buf[self.data + a:self.data + b], "utf-8")
+
+
+class ChannelMap(Mapping):
+    """id -> canal leído del archivo (Node usa solo los de sus vecinos; keys() es la tabla de ids)."""
+    def __init__(self, topo:"CompiledTopology"):
+        self.topo = topo
+        self._cache: Dict[str, str] = {}
+
+    def __getitem__(self, node_id:str) -> str:
+        ch = self._cache.get(node_id)
+        if ch is None:
+            ch = self.topo.names[self.topo.index(node_id)]
+            if not ch:
+                raise KeyError(node_id)  # id de la topología sin nombre
+            self._cache[node_id] = ch
+        return ch
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.topo.ids.all())
+
+    def __len__(self):
+        return len(self.topo.ids)
+
+
+class CompiledTopology:
+    def __init__(self, path:str):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, n, self.edges, off_ids, off_names, self.off_idx, self.off_adj = \
+            _HDR.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: no es una topología compilada (v{VERSION})")
+        self.ids = _StringTable(self.mm, off_ids, n)
+        self.names = _StringTable(self.mm, off_names, n) if flags & F_NAMES else None
+
+    def index(self, node_id:str) -> int:
+        i = bisect.bisect_left(self.ids, node_id)
+        if i == len(self.ids) or self.ids[i] != node_id:
+            raise KeyError(node_id)
+        return i
+
+    def neighbors(self, node_id:str) -> Dict[str,int]:
+        try:
+            i = self.index(node_id)
+        except KeyError:
+            return {}
+        a, b = struct.unpack_from("<II", self.mm, self.off_idx + 4 * i)
+        out = {}
+        for k in range(a, b):
+            v, w = _EDGE.unpack_from(self.mm, self.off_adj + k * _EDGE.size)
+            out[self.ids[v]] = w
+        return out
+
+    def channel_map(self) -> Optional[ChannelMap]:
+        return ChannelMap(self) if self.names is not None else None
+
+    def close(self):
+        self.mm.close()
+
@@ -0,0 +1,228 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
+try:
+    import redis.asyncio as redis
+except ImportError:  # solo hace falta para RedisTransport
+    redis = None
+from .utils import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, SEND_COALESCE_MS, SEND_MAX_BATCH, PUBLISH_CONCURRENCY
+from .log import get_logger
+
+_log = get_logger("outbox")
+
+Data = Union[bytes, str]
+Item = Tuple[str, Data]  # (canal, payload)
+
+class Transport:
+    """
+    Pub/sub minimo que usan Node y Sec30Node.
+    publish() devuelve cuantos suscriptores recibieron el mensaje (como Redis),
+    get_message() devuelve el payload crudo o None si vence el timeout;
+    listen() entrega cada payload apenas llega (sin polling).
+    """
+    async def connect(self):
+        pass
+
+    async def subscribe(self, *channels:str):
+        raise NotImplementedError
+
+    async def publish(self, channel:str, data:Data) -> int:
+        raise NotImplementedError
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        """Fan-out: envios concurrentes con tope PUBLISH_CONCURRENCY; los backends pueden hacer pipeline."""
+        if len(items) <= 1:
+            return sum([await self.publish(ch, d) for ch, d in items])
+        sem = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+        async def one(ch, d):
+            async with sem:
+                return await self.publish(ch, d)
+        return sum(await asyncio.gather(*(one(ch, d) for ch, d in items)))
+
+    async def get_message(self, timeout:Optional[float]=None) -> Optional[Data]:
+        raise NotImplementedError
+
+    async def listen(self) -> AsyncIterator[Data]:
+        while True:
+            data = await self.get_message(timeout=None)
+            if data is not None:
+                yield data
+
+    async def close(self):
+        pass
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class RedisTransport(Transport):
+    def __init__(self, host:str=REDIS_HOST, port:int=REDIS_PORT, password:Optional[str]=REDIS_PASSWORD):
+        if redis is None:
+            raise RuntimeError("RedisTransport requiere el paquete 'redis' (pip install -r requirements.txt)")
+        self.host, self.port = host, port
+        self.r = redis.Redis(host=host, port=port, password=password)
+        self.pubsub = None
+
+    async def subscribe(self, *channels:str):
+        if self.pubsub is None:
+            self.pubsub = self.r.pubsub()
+        await self.pubsub.subscribe(*channels)
+
+    async def publish(self, channel:str, data:Data) -> int:
+        return await self.r.publish(channel, data)
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        if len(items) == 1:
+            return await self.publish(*items[0])
+        # un solo round trip para todo el lote
+        async with self.r.pipeline(transaction=False) as pipe:
+            for ch, d in items:
+                pipe.publish(ch, d)
+            return sum(await pipe.execute())
+
+    async def get_message(self, timeout:Optional[float]=None) -> Optional[Data]:
+        assert self.pubsub is not None, "subscribe() antes de get_message()"
+        raw = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not raw:
+            return None
+        return raw["data"]
+
+    async def listen(self) -> AsyncIterator[Data]:
+        assert self.pubsub is not None, "subscribe() antes de listen()"
+        # bloquea en el socket hasta que llega algo: sin timeout ni sleep
+        async for raw in self.pubsub.listen():
+            if raw.get("type") in ("message", "pmessage"):
+                yield raw["data"]
+
+    async def close(self):
+        if self.pubsub is not None:
+            await self.pubsub.close()
+        await self.r.aclose()
+
+    def describe(self) -> str:
+        return f"redis={self.host}:{self.port}"
+
+
+class LoopbackBus:
+    """Bus en memoria: canal -> colas de los transportes suscritos (mismo event loop)."""
+    def __init__(self):
+        self.subscribers: Dict[str, List["LoopbackTransport"]] = {}
+
+    def transport(self) -> "LoopbackTransport":
+        return LoopbackTransport(self)
+
+    def deliver(self, channel:str, data:Data) -> int:
+        subs = self.subscribers.get(channel, ())
+        for t in subs:
+            t.queue.put_nowait(data)
+        return len(subs)
+
+
+class LoopbackTransport(Transport):
+    def __init__(self, bus:LoopbackBus):
+        self.bus = bus
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.channels: List[str] = []
+
+    async def subscribe(self, *channels:str):
+        for ch in channels:
+            if ch in self.channels:
+                continue
+            self.channels.append(ch)
+            self.bus.subscribers.setdefault(ch, []).append(self)
+
+    async def publish(self, channel:str, data:Data) -> int:
+        return self.bus.deliver(channel, data)
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        return sum(self.bus.deliver(ch, d) for ch, d in items)
+
+    async def get_message(self, timeout:Optional[float]=None) -> Optional[Data]:
+        if timeout is None:
+            return await self.queue.get()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def listen(self) -> AsyncIterator[Data]:
+        while True:
+            yield await self.queue.get()
+
+    async def close(self):
+        for ch in self.channels:
+            subs = self.bus.subscribers.get(ch, [])
+            if self in subs:
+                subs.remove(self)
+        self.channels = []
+
+    def describe(self) -> str:
+        return "loopback"
+
+
+class Outbox:
+    """
+    Cola de salida sobre un Transport. Con window=0 cada send() publica de inmediato;
+    con window>0 junta lo enviado durante la ventana y lo publica en un solo
+    publish_many() (o antes, si se llega a max_batch).
+    """
+    def __init__(self, transport:Transport, window_ms:float=SEND_COALESCE_MS, max_batch:int=SEND_MAX_BATCH):
+        self.transport = transport
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.pending: List[Item] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # flushes que disparó el timer, aún corriendo
+        self.latency = None  # Histogram opcional (ms por publish_many)
+
+    async def send(self, channel:str, data:Data):
+        await self.send_many([(channel, data)])
+
+    async def send_many(self, items:Sequence[Item]):
+        if not items:
+            return
+        if self.window <= 0:
+            await self._publish(items)
+            return
+        self.pending.extend(items)
+        if len(self.pending) >= self.max_batch:
+            await self.flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.window, self._on_timer)
+
+    def _on_timer(self):
+        task = asyncio.create_task(self._flush_safe())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            await self._publish(batch)
+
+    async def _publish(self, items:Sequence[Item]):
+        if self.latency is None:
+            await self.transport.publish_many(items)
+            return
+        with self.latency.time_ms():
+            await self.transport.publish_many(items)
+
+    async def _flush_safe(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            _log.warning("flush error: %s", e, event="error")
+
+    async def close(self):
+        """Descarta lo pendiente y cancela el timer y los flushes en curso."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        tasks = list(self._tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.pending = []
@@ -6,11 +6,69 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", "16379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "4YNydkHFPcayvlx7$zpKm")
 
 TTL_DEFAULT = int(os.getenv("TTL_DEFAULT", "8"))
+# formato de envio: json | bin (ver core/protocol.py:Codec); al recibir se aceptan ambos
+WIRE_CODEC = os.getenv("WIRE_CODEC", "json")
 HELLO_INTERVAL = float(os.getenv("HELLO_INTERVAL", "5"))
 INFO_INTERVAL  = float(os.getenv("INFO_INTERVAL",  "8"))
 
+# envio: ventana de coalescencia (0 = sin ventana), tope de lote y de publicaciones concurrentes
+SEND_COALESCE_MS = float(os.getenv("SEND_COALESCE_MS", "0"))
+SEND_MAX_BATCH = int(os.getenv("SEND_MAX_BATCH", "256"))
+PUBLISH_CONCURRENCY = int(os.getenv("PUBLISH_CONCURRENCY", "32"))
+
+# flooding: tamaño máximo y vida (s) del cache de ids vistos
+FLOOD_SEEN_CAPACITY = int(os.getenv("FLOOD_SEEN_CAPACITY", "65536"))
+FLOOD_SEEN_TTL = float(os.getenv("FLOOD_SEEN_TTL", "120"))
+
+# DVR: costo a partir del cual un destino es inalcanzable y espera (s) antes de una actualización disparada
+DV_MAX_COST = float(os.getenv("DV_MAX_COST", "16384"))
+DV_TRIGGER_DELAY = float(os.getenv("DV_TRIGGER_DELAY", "0.5"))
+# DVR: el vector de un vecino que no se refresca en DV_HOLD s (3 refrescos completos) se descarta
+DV_HOLD = float(os.getenv("DV_HOLD", str(3 * INFO_INTERVAL)))
+
+# LSR: vida máxima de un LSP y refresco de un LSP sin cambios (s); temporizadores
+# "inicio,espera,máximo" (s) con backoff exponencial para originar LSPs y correr el SPF
+LSP_MAX_AGE = float(os.getenv("LSP_MAX_AGE", "600"))
+LSP_REFRESH_INTERVAL = float(os.getenv("LSP_REFRESH_INTERVAL", "180"))
+LSP_GEN_THROTTLE = tuple(float(x) for x in os.getenv("LSP_GEN_THROTTLE", "0,0.5,5").split(","))
+SPF_THROTTLE = tuple(float(x) for x in os.getenv("SPF_THROTTLE", "0.05,0.2,5").split(","))
+
+# costo por RTT: pesos del EWMA (SRTT, RTTVAR), cambio relativo mínimo para propagar y banda de costo
+RTT_ALPHA = float(os.getenv("RTT_ALPHA", "0.125"))
+RTT_BETA = float(os.getenv("RTT_BETA", "0.25"))
+COST_CHANGE_THRESHOLD = float(os.getenv("COST_CHANGE_THRESHOLD", "0.25"))
+COST_BAND = int(os.getenv("COST_BAND", "1"))
+
+# LSR multipath: siguientes saltos por destino (1 = sin ECMP) y tolerancia relativa para caminos casi iguales
+ECMP_MAX_PATHS = int(os.getenv("ECMP_MAX_PATHS", "1"))
+ECMP_TOLERANCE = float(os.getenv("ECMP_TOLERANCE", "0"))
+
+# Node: workers que manejan mensajes en paralelo (0 = en serie, en el orden de llegada) y tamaño de cada cola
+HANDLER_WORKERS = int(os.getenv("HANDLER_WORKERS", "0"))
+HANDLER_QUEUE_SIZE = int(os.getenv("HANDLER_QUEUE_SIZE", "1024"))
+
+# logging: nivel, y por (nodo, evento) registros/s permitidos y ráfaga máxima (0 = sin límite)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_RATE = float(os.getenv("LOG_RATE", "5"))
+LOG_BURST = int(os.getenv("LOG_BURST", "20"))
+# tablas de ruteo: se imprimen solo al cambiar, como mucho una vez cada LOG_TABLE_DELAY s
+LOG_TABLE_DELAY = float(os.getenv("LOG_TABLE_DELAY", "1"))
+
+# arranque en caliente: directorio de snapshots (vacío = sin persistencia), cada cuánto (s) se
+# guarda y antigüedad máxima (s) de un snapshot para restaurarlo
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "10"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "600"))
+
+# reloj de pared; el simulador lo reemplaza por su reloj virtual (set_clock)
+_clock = time.time
+
+def set_clock(fn=None):
+    global _clock
+    _clock = fn or time.time
+
 def now_ms() -> int:
-    return int(time.time() * 1000)
+    return int(_clock() * 1000)
 
 def make_msg(proto:str, mtype:str, src:str, dst:str, ttl:int=None, headers=None, payload=None) -> Dict[str,Any]:
     return {
@@ -26,5 +84,6 @@ def make_msg(proto:str, mtype:str, src:str, dst:str, ttl:int=None, headers=None,
 def pretty_table(table: Dict[str, dict]) -> str:
     lines = ["dest	cost	next"]
     for d, row in sorted(table.items()):
-        lines.append(f"{d}	{row.get('cost', float('inf'))}	{row.get('next', '-')}")
+        nxt = ",".join(row["nexts"]) if len(row.get("nexts", ())) > 1 else row.get('next', '-')
+        lines.append(f"{d}	{row.get('cost', float('inf'))}	{nxt}")
     return "\n".join(lines)
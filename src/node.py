@@ -1,81 +1,221 @@
-import asyncio, json, uuid, time
-from typing import Dict, Any
-import redis.asyncio as redis
-from .core.utils import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, HELLO_INTERVAL, INFO_INTERVAL, TTL_DEFAULT, now_ms, make_msg, pretty_table
-from .core.protocol import encode, decode
+import asyncio, json, uuid, time, zlib
+from typing import Dict, Any, Iterable, NamedTuple, Optional
+from .core.utils import HELLO_INTERVAL, INFO_INTERVAL, TTL_DEFAULT, FLOOD_SEEN_CAPACITY, FLOOD_SEEN_TTL, DV_MAX_COST, DV_TRIGGER_DELAY, DV_HOLD, HANDLER_WORKERS, HANDLER_QUEUE_SIZE, LOG_TABLE_DELAY, LSP_MAX_AGE, LSP_REFRESH_INTERVAL, LSP_GEN_THROTTLE, SPF_THROTTLE, RTT_ALPHA, RTT_BETA, COST_CHANGE_THRESHOLD, COST_BAND, ECMP_MAX_PATHS, ECMP_TOLERANCE, SNAPSHOT_DIR, SNAPSHOT_INTERVAL, SNAPSHOT_MAX_AGE, now_ms, make_msg
+from .core.protocol import make_codec
+from .core.dispatch import KeyedDispatcher
+from .core.throttle import Backoff, Throttled
+from .core.transport import Transport, RedisTransport, Outbox
+from .core.metrics import Registry, REGISTRY, MessageCounters
+from .core.log import get_logger, Table
+from .core.snapshot import snapshot_for
 from .algorithms.flooding import Flooding
 from .algorithms.distance_vector import DistanceVector
 from .algorithms.link_state import LinkState
+from .algorithms.rtt import RttEstimator
+
+class Fib(NamedTuple):
+    """Tabla de reenvío plana: destino -> siguiente salto (tupla si hay ECMP). Se reemplaza entera."""
+    generation: int
+    hops: Dict[str, Any]
+
 
 class Node:
-    def __init__(self, node_id:str, proto:str, neighbors:Dict[str,int], channel_map:Dict[str,str]):
+    def __init__(self, node_id:str, proto:str, neighbors:Dict[str,int], channel_map:Dict[str,str],
+                 transport:Optional[Transport]=None, metrics:Optional[Registry]=None,
+                 ids:Optional[Iterable[str]]=None):
         self.id = node_id
         self.proto = proto  # 'flooding' | 'dvr' | 'lsr'
         self.neighbors = dict(neighbors)  # neighbor -> cost
         self.channels = channel_map       # node_id -> redis channel
+        self.log = get_logger(node_id)
 
         # algorithms
-        self.flood = Flooding(node_id)
-        self.dv = DistanceVector(node_id)
+        self.flood = Flooding(node_id, FLOOD_SEEN_CAPACITY, FLOOD_SEEN_TTL)
+        self.dv = DistanceVector(node_id, DV_MAX_COST)
+        self._dv_trigger = None  # actualizacion disparada pendiente
+        self._table_dump = None  # impresion de tabla pendiente
         for n,c in neighbors.items():
             self.dv.set_neighbor_cost(n, c)
-        self.ls = LinkState(node_id)
+        self.ls = LinkState(node_id, LSP_MAX_AGE, LSP_REFRESH_INTERVAL, ECMP_MAX_PATHS, ECMP_TOLERANCE)
+        # LSP propio solo ante cambios reales (o refresco) y SPF diferido, ambos con backoff
+        self.lsp_gen = Throttled(self._originate_lsp, Backoff(*LSP_GEN_THROTTLE))
+        self.spf_run = Throttled(self._recompute_tables, Backoff(*SPF_THROTTLE))
+        self._synced = set()        # vecinos con los que ya se intercambió la descripción de la LSDB
+        self._sync_pending = {}     # vecino -> (envío del dbd aún sin respuesta (s), intentos)
+
+        # tabla de ruteo (costos, para mostrar/anunciar) y la de reenvío derivada de ella
+        self.routing_table: Dict[str, Dict[str, Any]] = {}
+        self.fib = Fib(0, {})
+        # LSDB / vectores de vecinos / tabla en disco (SNAPSHOT_DIR); se restauran al arrancar
+        self.snapshot = snapshot_for(SNAPSHOT_DIR, node_id)
 
         # hello RTT memory
         self.hello_sent = {}  # id -> timestamp
+        self.rtt: Dict[str, RttEstimator] = {}  # vecino -> SRTT/RTTVAR y costo vigente
         self.loop = asyncio.get_event_loop()
 
-        self.r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD)
-        self.pubsub = None
+        # pub/sub backend (Redis por defecto, LoopbackTransport para correr en proceso)
+        self.transport = transport if transport is not None else RedisTransport()
+        self.outbox = Outbox(self.transport)
+        # JSON o binario (WIRE_CODEC); ids internados = topology_ids() de quien lanza (o los del mapa de nombres)
+        self.codec = make_codec(channel_map.keys() if ids is None else ids)
+        # manejo concurrente: hello/echo por un carril propio, el resto por clave de origen
+        self.control = None
+        self.workers = None
+        if HANDLER_WORKERS > 0:
+            on_error = lambda e: self.log.warning("handler error: %s", e, event="error")
+            self.control = KeyedDispatcher(self._handle_message, 1, HANDLER_QUEUE_SIZE, on_error)
+            self.workers = KeyedDispatcher(self._handle_message, HANDLER_WORKERS, HANDLER_QUEUE_SIZE, on_error)
+
+        # metricas (registro del proceso salvo que se pase otro)
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.msgs = MessageCounters(self.metrics, node_id)
+        self.outbox.latency = self.metrics.histogram("publish_latency_ms", node=node_id)
+        self._rtt_hist = self.metrics.histogram("hello_rtt_ms", node=node_id)
+        self._recompute_hist = self.metrics.histogram("recompute_ms", node=node_id, proto=proto)
+        self._route_changes = self.metrics.counter("route_changes_total", node=node_id)
+        self.metrics.gauge("queue_depth", lambda: len(self.outbox.pending), node=node_id, queue="outbox")
+        self.metrics.gauge("fib_generation", lambda: self.fib.generation, node=node_id)
+        seen = self.flood.seen
+        for stat in ("size", "hits", "misses", "evictions", "expired"):
+            self.metrics.gauge("flood_seen", lambda k=stat: seen.stats()[k], node=node_id, stat=stat)
+        if self.workers is not None:
+            self.metrics.gauge("queue_depth", lambda: self.control.depth() + self.workers.depth(),
+                               node=node_id, queue="handlers")
 
     async def start(self):
-        self.pubsub = self.r.pubsub()
-        await self.pubsub.subscribe(self.channels[self.id])
+        await self.transport.connect()
+        await self.transport.subscribe(self.channels[self.id])
+        if self.snapshot is not None:
+            self._restore()
+            asyncio.create_task(self._checkpoint_loop())
         asyncio.create_task(self._forwarding())
         asyncio.create_task(self._hello_loop())
         asyncio.create_task(self._info_loop())
-        print(f"[{self.id}] up @ proto={self.proto} redis={REDIS_HOST}:{REDIS_PORT}")
+        if self.proto == "lsr":
+            self.lsp_gen.trigger()
+        self.log.info("up @ proto=%s %s", self.proto, self.transport.describe())
         while True:
             await asyncio.sleep(3600)
 
     # -------- loops --------
     async def _forwarding(self):
-        assert self.pubsub is not None
-        while True:
-            raw = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
-            if not raw: 
-                continue
+        if self.workers is not None:
+            self.control.start(); self.workers.start()
+        async for raw in self.transport.listen():
             try:
-                msg = decode(raw["data"])
+                msg = self.codec.decode(raw)
             except Exception as e:
-                print(f"[{self.id}] decode error: {e}")
+                self.msgs.inc("dropped", "undecodable")
+                self.log.warning("decode error: %s", e, event="decode")
                 continue
-            await self._handle_message(msg)
+            self.msgs.inc("in", msg.get("type"))
+            if self.workers is None:
+                await self._handle_message(msg)
+            elif msg.get("type") in ("hello", "echo"):
+                await self.control.submit(None, msg)
+            else:
+                await self.workers.submit(self._order_key(msg), msg)
+
+    @staticmethod
+    def _order_key(msg:Dict[str,Any]):
+        # LSPs en orden por quien los origina; el resto por remitente
+        lsp = msg.get("payload", {}).get("lsp") if msg.get("type") == "info" else None
+        if isinstance(lsp, dict) and "src" in lsp:
+            return lsp["src"]
+        return msg.get("from")
 
     async def _hello_loop(self):
         while True:
             await asyncio.sleep(HELLO_INTERVAL)
+            batch = []
             for neigh in self.neighbors:
                 mid = str(uuid.uuid4())
                 self.hello_sent[mid] = now_ms()
                 m = make_msg(self.proto, "hello", self.id, neigh, headers=[{"id":mid}])
-                await self._send(neigh, m)
+                batch.append((neigh, m))
+            # de a uno: un envío que falla no se lleva los hello del resto de los vecinos
+            res = await asyncio.gather(*(self._send(n, m) for n, m in batch), return_exceptions=True)
+            for (n, _), r in zip(batch, res):
+                if isinstance(r, Exception):
+                    self.log.warning("error hello->%s: %s", n, r, event="error")
 
     async def _info_loop(self):
         while True:
             await asyncio.sleep(INFO_INTERVAL)
             if self.proto == "dvr":
-                vector = self.dv.export_vector()
-                payload = {"vector": vector}
-                for neigh in self.neighbors:
-                    m = make_msg(self.proto, "info", self.id, neigh, payload=payload)
-                    await self._send(neigh, m)
+                # vecinos callados (caídos, o restaurados del snapshot y que no volvieron): fuera
+                dead = self.dv.age_out(now_ms() / 1000, DV_HOLD)
+                if dead:
+                    self.log.info("vectores vencidos (sin refresco en %.0fs): %s", DV_HOLD, dead)
+                    self._recompute_tables()
+                # refresco completo periodico (poison reverse por vecino)
+                self.dv.take_changed()
+                await self._send_many([(neigh, make_msg(self.proto, "info", self.id, neigh,
+                                                        payload={"vector": self.dv.export_vector(to=neigh)}))
+                                       for neigh in self.neighbors])
             elif self.proto == "lsr":
-                lsp = self.ls.build_lsp(self.neighbors)
-                # flood LSP to vecinos
-                for neigh in self.neighbors:
-                    m = make_msg(self.proto, "info", self.id, neigh, payload={"lsp": lsp})
-                    await self._send(neigh, m)
+                # en estado estable no se envía nada: solo purga por edad y refresco cada LSP_REFRESH_INTERVAL
+                now = now_ms() / 1000
+                if self.ls.age_out(now):
+                    self.spf_run.trigger()
+                if self.ls.needs_origination(self.neighbors, now):
+                    self.lsp_gen.trigger()
+                # dbd sin respuesta: reintentar (hasta 3 veces; un vecino viejo no contesta)
+                for neigh, (sent, tries) in list(self._sync_pending.items()):
+                    if now - sent >= INFO_INTERVAL:
+                        if tries >= 3:
+                            del self._sync_pending[neigh]
+                        else:
+                            await self._send_dbd(neigh, tries + 1)
+
+    async def _on_lsr_info(self, msg:Dict[str,Any], src:str):
+        payload = msg.get("payload", {})
+        now = now_ms() / 1000
+        if "dbd" in payload:
+            await self._on_dbd(src, payload["dbd"], now)
+        if "lsreq" in payload or "lsps" in payload:
+            self._sync_pending.pop(src, None)  # respuesta a nuestro dbd
+        if payload.get("lsreq"):
+            await self._send(src, make_msg(self.proto, "info", self.id, src,
+                                           payload={"lsps": self.ls.export(payload["lsreq"], now)}))
+        if "lsp" in payload:
+            if self.ls.ingest_lsp(payload["lsp"], now):
+                # flood onwards except where it came from
+                await self._flood_copy(msg, src)
+            else:
+                self.msgs.inc("duplicate", "info")
+        elif payload.get("lsps"):
+            # LSPs agrupados: se reenvían juntos solo los que eran nuevos
+            fresh = [l for l in payload["lsps"] if self.ls.ingest_lsp(l, now)]
+            if len(fresh) < len(payload["lsps"]):
+                self.msgs.inc("duplicate", "info", len(payload["lsps"]) - len(fresh))
+            if fresh:
+                await self._send_many([(n, make_msg(self.proto, "info", self.id, n, payload={"lsps": fresh}))
+                                       for n in self.neighbors if n != src])
+        if self.ls.dirty:
+            self.spf_run.trigger()
+        if self.ls.own_stale:
+            self.lsp_gen.trigger()
+
+    async def _send_dbd(self, neigh:str, tries:int=1):
+        self._sync_pending[neigh] = (now_ms() / 1000, tries)
+        await self._send(neigh, make_msg(self.proto, "info", self.id, neigh, payload={"dbd": self.ls.summary()}))
+
+    async def _on_dbd(self, src:str, summary:Dict[str,int], now:float):
+        # una sola vuelta: le mandamos lo que le falta y pedimos lo que nos falta
+        self._synced.add(src)
+        push, want = self.ls.diff(summary)
+        await self._send(src, make_msg(self.proto, "info", self.id, src,
+                                       payload={"lsps": self.ls.export(push, now), "lsreq": want}))
+
+    async def _originate_lsp(self):
+        lsp = self.ls.originate(self.neighbors, now_ms() / 1000)
+        if self.ls.dirty:
+            self.spf_run.trigger()
+        # flood LSP to vecinos
+        await self._send_many([(neigh, make_msg(self.proto, "info", self.id, neigh, payload={"lsp": lsp}))
+                               for neigh in self.neighbors])
 
     # -------- handlers --------
     async def _handle_message(self, msg:Dict[str,Any]):
@@ -88,6 +228,10 @@ class Node:
                 if "id" in h: mid = h["id"]
             echo = make_msg(self.proto, "echo", self.id, src, headers=[{"id": mid}])
             await self._send(src, echo)
+            if self.proto == "lsr" and src in self.neighbors and src not in self._synced:
+                # adyacencia arriba: sincronizar LSDBs con el vecino
+                self._synced.add(src)
+                await self._send_dbd(src)
             return
         if mtype == "echo" and dst == self.id:
             mid = None
@@ -95,49 +239,61 @@ class Node:
                 if "id" in h: mid = h["id"]
             if mid in self.hello_sent:
                 rtt = now_ms() - self.hello_sent.pop(mid)
-                # update neighbor cost to simple RTT/2 rounded (keep min to stabilize)
+                self._rtt_hist.observe(rtt)
+                # costo = SRTT/2 con histéresis: el ruido de medición no cambia rutas
                 neigh = src
-                cost = max(1, int(rtt/2))
+                est = self.rtt.get(neigh)
+                if est is None:
+                    est = self.rtt[neigh] = RttEstimator(RTT_ALPHA, RTT_BETA, COST_CHANGE_THRESHOLD, COST_BAND)
+                cost = est.sample(rtt)
+                self.log.debug("RTT %s ~%sms srtt=%.1f -> cost %s", src, rtt, est.srtt, est.cost, event="rtt")
+                if cost is None or self.neighbors.get(neigh) == cost:
+                    return
                 self.neighbors[neigh] = cost
                 self.dv.set_neighbor_cost(neigh, cost)
-                # also refresh our own LSP database entry
-                self.ls.ingest_lsp({"src": self.id, "seq": 0, "links": self.neighbors})
-                print(f"[{self.id}] RTT {src} ~{rtt}ms -> cost {cost}")
-                self._recompute_tables()
+                if self.proto == "lsr":
+                    # el LSP propio (y con él la entrada propia de la LSDB) solo si cambió el costo
+                    self.lsp_gen.trigger()
+                else:
+                    self._recompute_tables()
             return
         if mtype == "info":
             if self.proto == "dvr" and dst == self.id:
-                vec = msg.get("payload",{}).get("vector",{})
-                self.dv.ingest_vector(src, vec)
+                payload = msg.get("payload",{})
+                self.dv.ingest_vector(src, payload.get("vector",{}), partial=bool(payload.get("partial")),
+                                      now=now_ms() / 1000)
                 self._recompute_tables()
             elif self.proto == "lsr":
-                lsp = msg.get("payload",{}).get("lsp")
-                changed = self.ls.ingest_lsp(lsp)
-                if changed:
-                    # flood onwards except where it came from
-                    for neigh in self.neighbors:
-                        if neigh == src: 
-                            continue
-                        forward = msg.copy()
-                        forward["to"] = neigh
-                        await self._send(neigh, forward)
-                    self._recompute_tables()
+                await self._on_lsr_info(msg, src)
             return
 
         # data message
         if mtype == "message":
             if dst == self.id:
+                probe = msg.get("payload",{}).get("probe")
+                if isinstance(probe, dict) and probe.get("report"):
+                    await self._report_delivery(msg, probe)
+                    return
                 text = msg.get("payload",{}).get("text")
-                print(f"[{self.id}] <{src}> {text}")
+                self.log.info("<%s> %s", src, text)
                 return
             # TTL check
             ttl = int(msg.get("ttl", 1))
             if ttl <= 0:
-                print(f"[{self.id}] drop TTL0 {msg}")
+                self.msgs.inc("ttl_expired", mtype)
+                self.log.info("drop TTL0 %s", msg, event="ttl")
                 return
             msg["ttl"] = ttl - 1
             await self._route_and_forward(msg, src)
             return
+        self.msgs.inc("dropped", mtype)
+
+    async def _report_delivery(self, msg:Dict[str,Any], probe:Dict[str,Any]):
+        # mensaje de prueba (tools/send_message.py --load): aviso directo al canal del generador
+        rep = make_msg(self.proto, "report", self.id, msg.get("from"), ttl=msg.get("ttl"),
+                       payload={"probe": probe, "recv_ms": now_ms()})
+        self.msgs.inc("out", "report")
+        await self.outbox.send(str(probe["report"]), self.codec.encode(rep))
 
     async def _route_and_forward(self, msg:Dict[str,Any], src:str):
         dst = msg["to"]
@@ -151,38 +307,168 @@ class Node:
                 hid = str(uuid.uuid4())
                 msg["headers"] = msg.get("headers", []) + [{"id":hid}]
             if not self.flood.should_forward(hid):
+                self.msgs.inc("duplicate", msg.get("type"))
                 return
-            for n in self.neighbors:
-                if n == src: 
-                    continue
-                fwd = msg.copy(); fwd["to"] = n
-                await self._send(n, fwd)
+            await self._flood_copy(msg, src, retarget=False)
         else:
             # table-based
-            table = getattr(self, 'routing_table', {})
-            nex = table.get(dst, {}).get("next")
+            nex = self.fib.hops.get(dst)  # una lectura: la generación vigente entera
+            if type(nex) is tuple:
+                nex = self._pick_next(msg, nex)
             if not nex:
                 # fallback: try flooding to discover
-                for n in self.neighbors:
-                    if n == src: 
-                        continue
-                    fwd = msg.copy(); fwd["to"] = n
-                    await self._send(n, fwd)
+                await self._flood_copy(msg, src, retarget=False)
             else:
-                fwd = msg.copy(); fwd["to"] = nex
-                await self._send(nex, fwd)
+                # "to" sigue siendo el destino final; el canal elige el siguiente salto
+                await self._send(nex, msg.copy())
+
+    @staticmethod
+    def _pick_next(msg:Dict[str,Any], nexts):
+        # ECMP por flujo: mismo (from, to, flow) -> mismo salto, así no se reordena un flujo
+        flow = None
+        for h in msg.get("headers", []):
+            if "flow" in h: flow = h["flow"]
+        key = f"{msg.get('from')}|{msg.get('to')}|{flow}".encode()
+        return nexts[zlib.crc32(key) % len(nexts)]
 
     def _recompute_tables(self):
+        with self._recompute_hist.time_ms():
+            self._recompute()
+
+    def _count_route_changes(self, old:Dict[str,Any], new:Dict[str,Any]):
+        changed = sum(1 for d in new if old.get(d, {}).get("next") != new[d].get("next"))
+        changed += sum(1 for d in old if d not in new)
+        if changed:
+            self._route_changes.inc(changed)
+        return changed
+
+    def _recompute(self):
+        old = self.routing_table
         if self.proto == "dvr":
             if self.dv.recompute():
                 self.routing_table = dict(self.dv.table)
-                print(f"[{self.id}] DVR table:\n{pretty_table(self.routing_table)}")
+                self._count_route_changes(old, self.routing_table)
+                self._table_changed(old)
+                if self._dv_trigger is None:
+                    self._dv_trigger = asyncio.ensure_future(self._dv_triggered_update())
         elif self.proto == "lsr":
             self.routing_table = self.ls.compute_spf()
-            print(f"[{self.id}] LSR table:\n{pretty_table(self.routing_table)}")
+            self._count_route_changes(old, self.routing_table)
+            self._table_changed(old)
         else:
             self.routing_table = {}
 
+    def _table_changed(self, old:Dict[str,Any]):
+        if self.routing_table == old:
+            return
+        self._install_fib()
+        # la tabla se imprime a lo sumo una vez cada LOG_TABLE_DELAY
+        # (se imprime la última: los cambios intermedios se pierden a propósito)
+        if self._table_dump is None:
+            self._table_dump = asyncio.get_event_loop().call_later(LOG_TABLE_DELAY, self._log_table)
+
+    def _install_fib(self):
+        # se arma completa y se publica con una sola asignación
+        hops = {}
+        for d, row in self.routing_table.items():
+            nexts = row.get("nexts")
+            nh = tuple(nexts) if nexts and len(nexts) > 1 else row.get("next")
+            if nh is not None and d != self.id:
+                hops[d] = nh
+        self.fib = Fib(self.fib.generation + 1, hops)
+
+    def _log_table(self):
+        self._table_dump = None
+        self.log.info("%s table:\n%s", self.proto.upper(), Table(self.routing_table))
+
+    async def _dv_triggered_update(self):
+        # espera DV_TRIGGER_DELAY para juntar cambios y manda solo las entradas que cambiaron
+        try:
+            await asyncio.sleep(DV_TRIGGER_DELAY)
+            changed = self.dv.take_changed()
+            if changed:
+                await self._send_many([(neigh, make_msg(self.proto, "info", self.id, neigh,
+                                                        payload={"vector": self.dv.export_vector(to=neigh, only=changed),
+                                                                 "partial": True}))
+                                       for neigh in self.neighbors])
+        finally:
+            self._dv_trigger = None
+
+    # -------- snapshot (arranque en caliente) --------
+    def _snapshot_state(self) -> Dict[str,Any]:
+        state = {"proto": self.proto, "table": self.routing_table}
+        if self.proto == "lsr":
+            state["seq"] = self.ls.seq
+            for src, rec in self.ls.lspdb.items():
+                state["lsp/" + src] = rec
+        elif self.proto == "dvr":
+            for n, vec in self.dv.vectors_from_neighbors.items():
+                state["dv/" + n] = {"vector": vec, "rx": self.dv.heard.get(n, 0)}
+        return state
+
+    def _restore(self):
+        # la tabla guardada se instala ya; la LSDB / los vectores restaurados la recalculan,
+        # y lo que llegue de la red reemplaza a lo restaurado como siempre
+        ts, state = self.snapshot.load()
+        now = now_ms() / 1000
+        if ts is None or now - ts > SNAPSHOT_MAX_AGE or state.get("proto") != self.proto:
+            return
+        restored = 0
+        if self.proto == "lsr":
+            self.ls.seq = state.get("seq", 0)
+            for k, rec in state.items():
+                # los vencidos no entran; el LSP propio se origina de nuevo al arrancar
+                if k.startswith("lsp/") and k[4:] != self.id and rec["expires"] > now:
+                    restored += self.ls.ingest_lsp({"src": k[4:], "seq": rec["seq"], "links": rec["links"],
+                                                    "age": rec["expires"] - now}, now)
+        elif self.proto == "dvr":
+            for k, rec in state.items():
+                if not (k.startswith("dv/") and k[3:] in self.neighbors):
+                    continue
+                # con la hora de llegada original: vence con DV_HOLD como uno recibido en vivo
+                vec, rx = (rec["vector"], rec["rx"]) if "vector" in rec and "rx" in rec else (rec, ts)
+                if now - rx <= DV_HOLD:
+                    self.dv.ingest_vector(k[3:], vec, now=rx)
+                    restored += 1
+        # rutas guardadas solo por vecinos que siguen vigentes (en DVR, con su vector restaurado)
+        alive = self.dv.vectors_from_neighbors if self.proto == "dvr" else self.neighbors
+        old = self.routing_table
+        self.routing_table = {d: row for d, row in state.get("table", {}).items()
+                              if row.get("next") in alive}
+        self._table_changed(old)
+        if restored:
+            self._recompute_tables()
+        self.log.info("snapshot restaurado (%.0fs): %d entradas, %d rutas", now - ts, restored,
+                      len(self.fib.hops))
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            try:
+                self.snapshot.checkpoint(self._snapshot_state(), now_ms() / 1000)
+            except OSError as e:
+                self.log.warning("snapshot: %s", e, event="error")
+
+    async def _flood_copy(self, msg:Dict[str,Any], src:str, retarget:bool=True):
+        # una copia por vecino (excepto el que lo envio), en un solo lote;
+        # retarget=False conserva "to" (datos: destino final)
+        batch = []
+        for n in self.neighbors:
+            if n == src:
+                continue
+            fwd = msg.copy()
+            if retarget:
+                fwd["to"] = n
+            batch.append((n, fwd))
+        await self._send_many(batch)
+
     async def _send(self, node_id:str, msg:Dict[str,Any]):
         ch = self.channels[node_id]
-        await self.r.publish(ch, json.dumps(msg))
+        self.msgs.inc("out", msg.get("type"))
+        await self.outbox.send(ch, self.codec.encode(msg, node_id))
+
+    async def _send_many(self, batch):
+        # batch: [(node_id, msg), ...] -> un publish_many (pipeline en Redis)
+        for _, m in batch:
+            self.msgs.inc("out", m.get("type"))
+        await self.outbox.send_many([(self.channels[n], self.codec.encode(m, n)) for n, m in batch])
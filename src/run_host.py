@@ -0,0 +1,70 @@
+import argparse, json, asyncio
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from .node import Node
+from .sec30_node import Sec30Node
+from .core.hub import RedisHub
+from .core.transport import Transport
+from .core.topology import topology_ids
+from .core.metrics import add_metrics_args, start_exporters
+from .core.log import get_logger, setup_logging
+
+def load_json(p):
+    return json.loads(Path(p).read_text(encoding='utf-8'))
+
+def build_nodes(kind:str, ids:List[str], topo:Dict[str, Dict[str,int]], make_transport:Callable[[Optional[str]], Transport],
+                proto:str="lsr", names:Optional[Dict[str,str]]=None) -> list:
+    """
+    Crea los nodos `ids`; make_transport(canal_propio) da el transporte de cada uno.
+    Sec30Node recibe make_transport(None): sus vecinos (quizás en otro proceso) también
+    escuchan su canal, así que no puede entregarse solo en memoria (ver RedisHub).
+    """
+    nodes = []
+    table = topology_ids(topo, names)
+    for i in ids:
+        if kind == "sec30":
+            nodes.append(Sec30Node(i, topo, transport=make_transport(None), ids=table))
+        else:
+            nodes.append(Node(i, proto, topo.get(i, {}), names, transport=make_transport(names[i]), ids=table))
+    return nodes
+
+def add_node_args(ap):
+    ap.add_argument("--kind", choices=["node","sec30"], default="node", help="Node (run_node) o Sec30Node")
+    ap.add_argument("--proto", choices=["flooding","dvr","lsr"], default="lsr", help="Routing algorithm (kind=node)")
+    ap.add_argument("--topo", required=True, help="Path to topology JSON")
+    ap.add_argument("--names", help="Path to names JSON (kind=node)")
+
+def load_config(args):
+    topo = load_json(args.topo)["config"]
+    names = None
+    if args.kind == "node":
+        if not args.names:
+            raise SystemExit("--names es obligatorio con --kind node")
+        names = load_json(args.names)["config"]
+    return topo, names
+
+def main():
+    ap = argparse.ArgumentParser(description="Varios nodos en un proceso sobre una conexión Redis compartida")
+    add_node_args(ap)
+    ap.add_argument("--ids", nargs="*", help="Nodos a alojar (por defecto, todos los de la topología)")
+    add_metrics_args(ap)
+    args = ap.parse_args()
+
+    topo, names = load_config(args)
+    ids = args.ids or sorted(topo)
+
+    async def runner():
+        setup_logging()
+        start_exporters(args)
+        hub = RedisHub()
+        nodes = build_nodes(args.kind, ids, topo, hub.transport, args.proto, names)
+        get_logger("host").info("%d nodos (%s) @ redis=%s:%s", len(nodes), args.kind, hub.host, hub.port)
+        try:
+            await asyncio.gather(*(n.start() for n in nodes))
+        finally:
+            await hub.close()
+
+    asyncio.run(runner())
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import argparse, json, asyncio
 from pathlib import Path
 from .node import Node
+from .core.metrics import add_metrics_args, start_exporters
+from .core.log import setup_logging
+from .core.topology import CompiledTopology, is_compiled, topology_ids
 
 def load_json(p):
     return json.loads(Path(p).read_text(encoding='utf-8'))
@@ -9,15 +12,35 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--id", required=True, help="Node ID: N1..N11")
     ap.add_argument("--proto", required=True, choices=["flooding","dvr","lsr"], help="Routing algorithm")
-    ap.add_argument("--topo", required=True, help="Path to topology JSON")
-    ap.add_argument("--names", required=True, help="Path to names JSON")
+    ap.add_argument("--topo", required=True, help="Path to topology JSON (o compilada, ver src/tools/compile_topology.py)")
+    ap.add_argument("--names", help="Path to names JSON (no hace falta si la topología compilada trae nombres)")
+    add_metrics_args(ap)
     args = ap.parse_args()
 
-    topo = load_json(args.topo)["config"]
-    names = load_json(args.names)["config"]
-    neighbors = topo.get(args.id, {})
-    node = Node(args.id, args.proto, neighbors, names)
-    asyncio.run(node.start())
+    if is_compiled(args.topo):
+        # solo la fila propia y la tabla de ids, sin parsear la topología entera
+        ct = CompiledTopology(args.topo)
+        neighbors = ct.neighbors(args.id)
+        names = load_json(args.names)["config"] if args.names else ct.channel_map()
+        # la tabla del archivo ya es topology_ids(topo, nombres con que se compiló)
+        ids = ct.ids.all() if not args.names else sorted(set(ct.ids.all()) | set(names))
+    else:
+        if not args.names:
+            raise SystemExit("--names es obligatorio con una topología JSON")
+        topo = load_json(args.topo)["config"]
+        names = load_json(args.names)["config"]
+        neighbors = topo.get(args.id, {})
+        ids = topology_ids(topo, names)
+    if names is None:
+        raise SystemExit("la topología compilada no trae nombres: pasar --names")
+    node = Node(args.id, args.proto, neighbors, names, ids=ids)
+
+    async def runner():
+        setup_logging()
+        start_exporters(args)
+        await node.start()
+
+    asyncio.run(runner())
 
 if __name__ == "__main__":
     main()
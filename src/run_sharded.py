@@ -0,0 +1,228 @@
+import argparse, asyncio, math, multiprocessing as mp, os, queue, sys, threading, time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set
+from .core.transport import LoopbackBus, LoopbackTransport, Data, Item
+from .core.hub import RedisHub
+from .core.log import setup_logging
+from .run_host import build_nodes, add_node_args, load_config
+
+# ---------- particionado ----------
+def partition(topo:Dict[str, Dict[str,int]], k:int) -> List[List[str]]:
+    """k shards de tamaño parejo, cortando un recorrido BFS para que los vecinos tiendan a caer juntos."""
+    order, seen = [], set()
+    for root in sorted(topo):
+        if root in seen:
+            continue
+        seen.add(root)
+        q = deque([root])
+        while q:
+            u = q.popleft()
+            order.append(u)
+            for v in sorted(topo.get(u, {})):
+                if v in topo and v not in seen:
+                    seen.add(v); q.append(v)
+    size = math.ceil(len(order) / max(1, k))
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+# ---------- IPC entre shards ----------
+class IpcHub(LoopbackBus):
+    """
+    Bus de un shard con el mismo reparto que Redis pub/sub: cada publish llega a
+    todos los suscritos al canal, en este shard (en memoria) o en otros (a la cola
+    multiprocessing de cada shard con suscriptores, agrupado por shard). Cada
+    subscribe se avisa a los demás shards; como en Redis, lo publicado antes de que
+    llegue el aviso no le llega a ese suscriptor. Un hilo lector pasa lo que llega
+    al event loop.
+    """
+    def __init__(self, shard:int, inboxes:Sequence):
+        super().__init__()
+        self.shard = shard
+        self.inboxes = inboxes
+        self.remote_subs: Dict[str, Set[int]] = {}  # canal -> otros shards suscritos
+        self.local_sent = 0
+        self.remote_sent = 0
+        self.received = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def transport(self, owner:Optional[str]=None) -> "IpcTransport":
+        return IpcTransport(self)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.inboxes[self.shard].put(None)
+            self._thread.join(timeout=2.0)
+
+    def _read(self):
+        inbox = self.inboxes[self.shard]
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._deliver_batch, batch)
+            except RuntimeError:
+                return  # el loop ya cerró
+
+    def _deliver_batch(self, batch):
+        if isinstance(batch, dict):
+            # aviso de suscripción de otro shard
+            for ch in batch["sub"]:
+                self.remote_subs.setdefault(ch, set()).add(batch["shard"])
+            return
+        self.received += len(batch)
+        for ch, d in batch:
+            self.deliver(ch, d)
+
+    def announce(self, channels:Sequence[str]):
+        msg = {"shard": self.shard, "sub": list(channels)}
+        for s, inbox in enumerate(self.inboxes):
+            if s != self.shard:
+                inbox.put(msg)
+
+    def publish_many(self, items:Sequence[Item]) -> int:
+        n = 0
+        remote: Dict[int, list] = {}
+        for ch, d in items:
+            if ch in self.subscribers:
+                self.local_sent += 1
+                n += self.deliver(ch, d)
+            for s in self.remote_subs.get(ch, ()):
+                remote.setdefault(s, []).append((ch, d))
+        for s, batch in remote.items():
+            self.remote_sent += len(batch)
+            self.inboxes[s].put(batch)
+            n += len(batch)
+        return n
+
+    def stats(self) -> Dict[str, int]:
+        return {"local_sent": self.local_sent, "remote_sent": self.remote_sent, "received": self.received}
+
+
+class IpcTransport(LoopbackTransport):
+    async def subscribe(self, *channels:str):
+        new = [ch for ch in channels if ch not in self.bus.subscribers]
+        await super().subscribe(*channels)
+        if new:
+            self.bus.announce(new)
+
+    async def publish(self, channel:str, data:Data) -> int:
+        return self.bus.publish_many([(channel, data)])
+
+    async def publish_many(self, items:Sequence[Item]) -> int:
+        return self.bus.publish_many(items)
+
+    def describe(self) -> str:
+        return f"ipc shard={self.bus.shard}"
+
+# ---------- worker ----------
+def _node_stats(n) -> Dict[str, int]:
+    if hasattr(n, "routing_table"):
+        return {"routes": len([d for d in n.routing_table if d != n.id])}
+    if hasattr(n, "_spt"):
+        dist, _ = n._spt()
+        return {"routes": sum(1 for d in dist if d != math.inf) - 1}
+    return {"routes": 0}
+
+def _worker(shard:int, ids:List[str], args:dict, inboxes, results):
+    if args["quiet"]:
+        sys.stdout = open(os.devnull, "w")
+    setup_logging()
+    ns = argparse.Namespace(**args)
+    topo, names = load_config(ns)
+
+    async def run():
+        if ns.backend == "ipc":
+            hub = IpcHub(shard, inboxes)
+            hub.start()
+        else:
+            hub = RedisHub()
+        nodes = build_nodes(ns.kind, ids, topo, hub.transport, ns.proto, names)
+        for n in nodes:
+            asyncio.ensure_future(n.start())
+
+        def report(final:bool):
+            routes = [_node_stats(n)["routes"] for n in nodes]
+            results.put({"shard": shard, "pid": os.getpid(), "nodes": len(nodes), "final": final,
+                         "cpu_s": round(time.process_time(), 3), "routes_min": min(routes, default=0),
+                         "routes_avg": round(sum(routes) / max(1, len(routes)), 2), **hub.stats()})
+
+        t0 = time.monotonic()
+        while True:
+            await asyncio.sleep(ns.stats_interval)
+            final = ns.duration > 0 and time.monotonic() - t0 >= ns.duration
+            report(final)
+            if final:
+                break
+        rest = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in rest:
+            t.cancel()
+        await asyncio.gather(*rest, return_exceptions=True)
+        if ns.backend == "ipc":
+            hub.stop()
+        else:
+            await hub.close()
+
+    asyncio.run(run())
+
+# ---------- padre ----------
+def _print_totals(latest:Dict[int, dict], elapsed:float):
+    keys = ("nodes", "local_sent", "remote_sent", "received", "cpu_s")
+    tot = {k: round(sum(r.get(k, 0) for r in latest.values()), 3) for k in keys}
+    rmin = min((r["routes_min"] for r in latest.values()), default=0)
+    print(f"[sharded t={elapsed:6.1f}s] shards={len(latest)} " + " ".join(f"{k}={v}" for k, v in tot.items())
+          + f" routes_min={rmin}", flush=True)
+
+def main():
+    ap = argparse.ArgumentParser(description="Reparte una topología en varios procesos (un event loop por núcleo)")
+    add_node_args(ap)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos (shards)")
+    ap.add_argument("--backend", choices=["redis","ipc"], default="redis",
+                    help="Tráfico entre shards: Redis compartido o colas locales entre procesos")
+    ap.add_argument("--duration", type=float, default=0, help="Segundos a correr (0 = hasta Ctrl-C)")
+    ap.add_argument("--stats-interval", type=float, default=5.0)
+    ap.add_argument("--quiet", action="store_true", help="Silenciar la salida de los nodos")
+    args = ap.parse_args()
+
+    topo, names = load_config(args)
+    shards = partition(topo, args.workers)
+    ctx = mp.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in shards]
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(s, ids, vars(args), inboxes, results), daemon=True)
+             for s, ids in enumerate(shards)]
+    for p in procs:
+        p.start()
+    print(f"[sharded] {len(topo)} nodos en {len(shards)} shards ({args.backend}): "
+          + ", ".join(str(len(s)) for s in shards), flush=True)
+
+    latest: Dict[int, dict] = {}
+    fresh = set()
+    t0 = time.monotonic()
+    try:
+        while any(p.is_alive() for p in procs) or not results.empty():
+            try:
+                r = results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            latest[r["shard"]] = r
+            fresh.add(r["shard"])
+            if len(fresh) == len(shards):
+                _print_totals(latest, time.monotonic() - t0)
+                fresh.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+    if fresh:
+        _print_totals(latest, time.monotonic() - t0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse, contextlib, io, json
+from pathlib import Path
+from .simulator import Simulation, random_topology
+from .core.log import setup_logging
+
+def load_json(p):
+    return json.loads(Path(p).read_text(encoding='utf-8'))
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulación en tiempo virtual (sin Redis)")
+    ap.add_argument("--kind", choices=["node","sec30"], default="node", help="Node (run_node) o Sec30Node")
+    ap.add_argument("--proto", choices=["flooding","dvr","lsr"], default="lsr", help="Routing algorithm (kind=node)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--topo", help="Path to topology JSON")
+    src.add_argument("--random", type=int, metavar="N", help="Grafo aleatorio conexo de N nodos")
+    ap.add_argument("--degree", type=float, default=3.0, help="Grado medio del grafo aleatorio")
+    ap.add_argument("--duration", type=float, default=60.0, help="Segundos virtuales a simular")
+    ap.add_argument("--messages", type=int, default=20, help="Mensajes de datos a inyectar tras el warmup")
+    ap.add_argument("--delay-ms", type=float, default=5.0, help="Retardo base por enlace")
+    ap.add_argument("--per-weight-ms", type=float, default=0.0, help="Retardo extra por unidad de peso del enlace")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--loss", type=float, default=0.0, help="Probabilidad de pérdida por entrega")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--verbose", action="store_true", help="No silenciar la salida de los nodos")
+    args = ap.parse_args()
+
+    if args.topo:
+        topo = load_json(args.topo)["config"]
+    else:
+        prefix = "sec30" if args.kind == "sec30" else "N"
+        topo = random_topology(args.random, args.degree, seed=args.seed, prefix=prefix)
+
+    sim = Simulation(topo, kind=args.kind, proto=args.proto, duration=args.duration,
+                     data_messages=args.messages, seed=args.seed, delay_ms=args.delay_ms,
+                     jitter_ms=args.jitter_ms, per_weight_ms=args.per_weight_ms, loss=args.loss)
+    if args.verbose:
+        setup_logging()
+        result = sim.run()
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = sim.run()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 import argparse, asyncio, json, os, time, math
-from typing import Dict, Any, Tuple, Optional
-import redis.asyncio as redis
+from typing import Dict, Any, Iterable, List, Tuple, Optional
+from .core.transport import Transport, RedisTransport, Outbox
+from .core.protocol import make_codec
+from .core.utils import now_ms, LSP_GEN_THROTTLE, LSP_REFRESH_INTERVAL, LSP_MAX_AGE, SNAPSHOT_DIR, SNAPSHOT_INTERVAL, SNAPSHOT_MAX_AGE
+from .core.snapshot import snapshot_for
+from .core.topology import CompiledTopology, is_compiled, topology_ids
+from .core.throttle import Backoff, Throttled
+from .core.metrics import Registry, REGISTRY, MessageCounters, add_metrics_args, start_exporters
+from .core.log import get_logger, setup_logging
+from .algorithms.graph import IndexedGraph
+from .algorithms.link_state import SEQ_MOD, seq_newer
 
 REDIS_HOST = os.getenv("REDIS_HOST", "homelab.fortiguate.com")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "16379"))
@@ -9,32 +18,66 @@ REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "4YNydkHFPcayvlx7$zpKm")
 HELLO_INTERVAL = float(os.getenv("HELLO_INTERVAL", "3"))
 DECAY_INTERVAL = float(os.getenv("DECAY_INTERVAL", "1"))
 NEIGHBOR_TTL  = int(os.getenv("TTL_DEFAULT", "6"))  # segundos
-
-def now_ms() -> int:
-    return int(time.time()*1000)
-
-def log(id, *a):
-    print(f"[{id}]", " ".join(str(x) for x in a), flush=True)
+RECV_QUEUE_SIZE = int(os.getenv("RECV_QUEUE_SIZE", "1024"))  # mensajes decodificados en espera
+# además del "lsa" versionado, anunciar los enlaces propios con el formato viejo (uno por enlace)
+LEGACY_LINK_ADS = os.getenv("SEC30_LEGACY_LINKS", "0") == "1"
 
 def is_valid_id(x:str)->bool:
     return x.startswith("sec30.grupo") and ".nodo" in x
 
 class Sec30Node:
-    def __init__(self, node_id:str, topology:Dict[str, Dict[str,int]]):
+    def __init__(self, node_id:str, topology:Dict[str, Dict[str,int]], transport:Optional[Transport]=None,
+                 metrics:Optional[Registry]=None, ids:Optional[Iterable[str]]=None):
         assert is_valid_id(node_id), "El --id debe ser del tipo sec30.grupoX.nodoY"
         self.id = node_id
         self.topology = topology
+        self.log = get_logger(node_id)
         self.neighbors: Dict[str,int] = dict(topology.get(node_id, {}))
 
         self.G: Dict[str, Dict[str, Dict[str,int]]] = {}   # G[U][V] = {"weight":w, "time"?:int}
+        # aristas de G anunciadas por los dos extremos (solo pesos), indexadas para SPF
+        self.IG = IndexedGraph()
         self.edge_cache: Dict[Tuple[str,str], int] = {}     # (u,v)->w
+        self._edge_rx: Dict[Tuple[str,str], float] = {}     # (u,v)->cuándo llegó (s), para el snapshot
+        # aristas legacy restauradas del snapshot y que ningún anuncio en vivo confirmó todavía:
+        # vencen como un lsa (LSP_MAX_AGE desde que llegaron)
+        self._restored_edges: set = set()
+        # anuncios por origen: lsdb[origen] = {"seq": int, "links": {v: w}, "rx": s de llegada};
+        # el que no se refresca en LSP_MAX_AGE se purga
+        self.lsdb: Dict[str, Dict[str, Any]] = {}
+        self.seq = 0
+        self._advertised: Optional[Dict[str,int]] = None  # enlaces del último lsa propio
+        self._own_lsa: Optional[Dict[str,Any]] = None
+        self._advertised_ms = 0
+        self._heard: set = set()  # vecinos de los que llegó hello (desde que se levantó la adyacencia)
+        self.lsa_gen = Throttled(self._propagate_local_links, Backoff(*LSP_GEN_THROTTLE))
+        # LSDB y aristas aprendidas en disco (SNAPSHOT_DIR); se restauran al arrancar
+        self.snapshot = snapshot_for(SNAPSHOT_DIR, node_id)
+        # versión del grafo (sube en _set_edge/_del_edge) y SPT cacheado para esa versión
+        self.graph_version = 0
+        self._spt_version = -1
+        self._spt_dist: List[float] = []
+        self._spt_prev: List[int] = []
         self._stop = asyncio.Event()
 
         # meta: first_seen y último hello (solo vecinos)
         self.node_meta = {}  # node_id -> {"first_seen_ms": int, "last_hello_ms": int|None}
 
-        self.r: Optional[redis.Redis] = None
-        self.pubsub = None
+        # None -> RedisTransport al arrancar (start)
+        self.transport: Optional[Transport] = transport
+        self.outbox: Optional[Outbox] = None
+        # tabla de internado: todos los ids de la topología (o `ids` si solo se pasó la fila propia)
+        self.codec = make_codec(topology_ids(topology) if ids is None else ids)
+
+        self.recv_queue: Optional[asyncio.Queue] = None
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.msgs = MessageCounters(self.metrics, node_id)
+        self._spf_hist = self.metrics.histogram("recompute_ms", node=node_id, proto="sec30")
+        self._route_changes = self.metrics.counter("route_changes_total", node=node_id)
+        self.metrics.gauge("queue_depth", lambda: self.recv_queue.qsize() if self.recv_queue else 0,
+                           node=node_id, queue="recv")
+        self.metrics.gauge("queue_depth", lambda: len(self.outbox.pending) if self.outbox else 0,
+                           node=node_id, queue="outbox")
 
     # ---------- tabla interna ----------
     def _ensure_node(self, u:str):
@@ -46,13 +89,40 @@ class Sec30Node:
         entry = {"weight": int(w)}
         if with_timer:
             entry["time"] = NEIGHBOR_TTL
+        old = self.G[u].get(v)
         self.G[u][v] = entry
+        if old is None or old["weight"] != entry["weight"]:
+            self.graph_version += 1
+            self._sync_ig(u, v)
 
     def _del_edge(self, u:str, v:str):
         if u in self.G and v in self.G[u]:
             del self.G[u][v]
             if not self.G[u]:
                 del self.G[u]
+            self._sync_ig(u, v)
+            self.graph_version += 1
+
+    def _sync_ig(self, u:str, v:str):
+        # chequeo de doble vía: u<->v entra al SPF solo si lo anuncian los dos extremos
+        # (un anuncio viejo de un nodo caído no alcanza para pasar por él). Un vecino
+        # legacy (hello pero sin lsa) nunca anuncia el enlace hacia mí: su hello es la otra vía.
+        a = self.G.get(u, {}).get(v)
+        b = self.G.get(v, {}).get(u)
+        if a is not None and b is None and self._legacy_neighbor(u, v):
+            b = a
+        elif b is not None and a is None and self._legacy_neighbor(v, u):
+            a = b
+        if a is not None and b is not None:
+            self.IG.set_edge(u, v, a["weight"])
+            self.IG.set_edge(v, u, b["weight"])
+        else:
+            self.IG.del_edge(u, v)
+            self.IG.del_edge(v, u)
+        self.graph_version += 1
+
+    def _legacy_neighbor(self, u:str, v:str) -> bool:
+        return u == self.id and v in self._heard and v not in self.lsdb
 
     # ---------- meta ----------
     def _touch_first_seen(self, node_id:str):
@@ -71,7 +141,14 @@ class Sec30Node:
         return node_id
 
     async def send(self, dst:str, msg:Dict[str,Any]):
-        await self.r.publish(self._channel_for(dst), json.dumps(msg))
+        self.msgs.inc("out", msg.get("type"))
+        await self.outbox.send(self._channel_for(dst), self.codec.encode(msg, dst))
+
+    async def send_many(self, batch):
+        """batch: [(dst, msg), ...] en un solo lote (pipeline en Redis)."""
+        for _, m in batch:
+            self.msgs.inc("out", m.get("type"))
+        await self.outbox.send_many([(self._channel_for(d), self.codec.encode(m, d)) for d, m in batch])
 
     # ---------- mensajes ----------
     def _build_hello(self, to:str, hops:int)->Dict[str,Any]:
@@ -80,14 +157,24 @@ class Sec30Node:
     def _build_message(self, u:str, v:str, w:int)->Dict[str,Any]:
         return {"type":"message","from": u,"to": v,"hops": int(w)}
 
+    def _build_lsa(self, links:Dict[str,int])->Dict[str,Any]:
+        self.seq = self.seq % (SEQ_MOD - 1) + 1
+        return {"type":"lsa","from": self.id,"seq": self.seq,"links": dict(links)}
+
+    def _own_links(self) -> Dict[str,int]:
+        # solo vecinos que ya se oyeron: un vecino configurado pero callado no se anuncia
+        return {v: ent["weight"] for v, ent in self.G.get(self.id, {}).items() if v in self._heard}
+
     async def _hello_loop(self):
         while not self._stop.is_set():
             await asyncio.sleep(HELLO_INTERVAL)
-            for v,w in list(self.neighbors.items()):
-                try:
-                    await self.send(v, self._build_hello(v,w))
-                except Exception as e:
-                    log(self.id, "error hello->", v, e)
+            # de a uno: un envío que falla no se lleva los hello del resto de los vecinos
+            dsts = list(self.neighbors.items())
+            res = await asyncio.gather(*(self.send(v, self._build_hello(v, w)) for v, w in dsts),
+                                       return_exceptions=True)
+            for (v, _), r in zip(dsts, res):
+                if isinstance(r, Exception):
+                    self.log.warning("error hello->%s: %s", v, r, event="error")
 
     async def _decay_loop(self):
         """
@@ -129,38 +216,55 @@ class Sec30Node:
 
                 if elapsed > (NEIGHBOR_TTL + grace):
                     self._del_edge(self.id, v)
-                    log(self.id, f"vecino caído {v} (elapsed={elapsed:.1f}s), se elimina y se propaga")
+                    self._heard.discard(v)
+                    self.log.info("vecino caído %s (elapsed=%.1fs), se elimina y se propaga", v, elapsed)
                     changed = True
 
-            if changed:
-                await self._propagate_local_links()
+            # nada que anunciar hasta oír algún vecino (o retirar lo ya anunciado)
+            due = changed or now - self._advertised_ms >= LSP_REFRESH_INTERVAL * 1000
+            if due and (self._heard or self._advertised):
+                self.lsa_gen.trigger()
+            dead = self._age_out(now / 1000)
+            if dead:
+                self.log.info("anuncios vencidos (sin refresco en %.0fs): %s", LSP_MAX_AGE, dead)
 
     async def _propagate_local_links(self):
-        for v,ent in self.G.get(self.id, {}).items():
-            w = ent["weight"]
-            msg = self._build_message(self.id, v, w)
-            await self._flood(msg, prev_hop=None)
+        # un lsa con todos los enlaces propios (los que faltan quedan retirados) a todos los vecinos
+        links = self._own_links()
+        self._advertised, self._advertised_ms = links, now_ms()
+        self._own_lsa = self._build_lsa(links)
+        batch = self._flood_batch(self._own_lsa, prev_hop=None)
+        if LEGACY_LINK_ADS:
+            for v, w in links.items():
+                batch.extend(self._flood_batch(self._build_message(self.id, v, w), prev_hop=None))
+        try:
+            await self.send_many(batch)
+        except Exception as e:
+            self.log.warning("error flood: %s", e, event="error")
+
+    def _flood_batch(self, msg:Dict[str,Any], prev_hop:Optional[str]):
+        return [(n, msg) for n in self.neighbors if n != prev_hop]
 
     async def _flood(self, msg:Dict[str,Any], prev_hop:Optional[str]):
-        for n in self.neighbors:
-            if n == prev_hop:
-                continue
-            try:
-                await self.send(n, msg)
-            except Exception as e:
-                log(self.id, "error flood->", n, e)
+        try:
+            await self.send_many(self._flood_batch(msg, prev_hop))
+        except Exception as e:
+            self.log.warning("error flood: %s", e, event="error")
 
     # ---------- ingesta ----------
     async def _on_hello(self, m:Dict[str,Any]):
         # Acepta solo HELLO dirigido a mí
         src = m.get("from"); dst = m.get("to")
         if dst != self.id or not src:
+            self.msgs.inc("dropped", "hello")
             return
         if not is_valid_id(src):
+            self.msgs.inc("dropped", "hello")
             return
         # Acepta HELLO solo de un vecino REAL (según la topología local)
         if src not in self.neighbors:
-            # log(self.id, f"HELLO ignorado de no-vecino {src}")
+            # self.log.debug("HELLO ignorado de no-vecino %s", src, event="hello")
+            self.msgs.inc("dropped", "hello")
             return
 
         # Tolerante con 'hops'
@@ -173,12 +277,30 @@ class Sec30Node:
             except Exception:
                 w = int(self.neighbors[src])
 
-        log(self.id, f"[HELLO] de {src} (w={w})")
+        self.log.debug("[HELLO] de %s (w=%s)", src, w, event="hello")
 
         # Actualiza/crea el enlace propio con timer
         self._touch_first_seen(src)
         self.node_meta[src]["last_hello_ms"] = now_ms()
         self._set_edge(self.id, src, w, with_timer=True)
+        if src not in self._heard:
+            # adyacencia arriba (primer hello o vecino que vuelve): le pasamos la LSDB entera
+            self._heard.add(src)
+            self._sync_ig(self.id, src)
+            await self._sync_lsdb(src)
+        if self._own_links() != self._advertised:
+            # vecino nuevo o costo distinto: anunciarlo
+            self.lsa_gen.trigger()
+
+    async def _sync_lsdb(self, dst:str):
+        # el lsa propio y todos los guardados; dst reenvía (sin devolvérnoslos) solo los que no tenía
+        msgs = [] if self._own_lsa is None else [dict(self._own_lsa, prev_hop=self.id)]
+        msgs += [{"type": "lsa", "from": o, "seq": rec["seq"], "links": rec["links"], "prev_hop": self.id}
+                 for o, rec in self.lsdb.items()]
+        try:
+            await self.send_many([(dst, m) for m in msgs])
+        except Exception as e:
+            self.log.warning("error sync: %s", e, event="error")
 
     async def _on_message(self, m:Dict[str,Any], prev_hop:Optional[str]):
         # 1) Validar formato
@@ -206,6 +328,11 @@ class Sec30Node:
 
         # 4) Supresión de duplicados (para ambos sentidos)
         if self.edge_cache.get(key_uv) == w and self.edge_cache.get(key_vu) == w:
+            self.msgs.inc("duplicate", "message")
+            if key_uv in self._restored_edges or key_vu in self._restored_edges:
+                # confirma lo restaurado: desde ahora es una arista aprendida en vivo
+                self._restored_edges.difference_update((key_uv, key_vu))
+                self._edge_rx[key_uv] = self._edge_rx[key_vu] = now_ms() / 1000
             return
 
         # 5) Aprender arista como NO dirigida (u<->v) para Dijkstra
@@ -213,135 +340,257 @@ class Sec30Node:
         self._touch_first_seen(v)
         self.edge_cache[key_uv] = w
         self.edge_cache[key_vu] = w
+        self._edge_rx[key_uv] = self._edge_rx[key_vu] = now_ms() / 1000
+        self._restored_edges.difference_update((key_uv, key_vu))
         self._set_edge(u, v, w, with_timer=False)
         self._set_edge(v, u, w, with_timer=False)
 
         # 6) Re-flood si pasó los filtros
         await self._flood(m, prev_hop=prev_hop)
 
-    # ---------- SPF ----------
-    def _build_graph(self) -> Dict[str, Dict[str,int]]:
-        G2: Dict[str,Dict[str,int]] = {}
-        for u, nbrs in self.G.items():
-            for v, ent in nbrs.items():
-                w = int(ent["weight"])
-                G2.setdefault(u, {})[v] = w
-        return G2
+    async def _on_lsa(self, m:Dict[str,Any]):
+        # anuncio versionado de todos los enlaces de un origen: se acepta y reenvía solo si es más nuevo
+        origin = m.get("from"); seq = m.get("seq"); links = m.get("links")
+        if not isinstance(origin, str) or not is_valid_id(origin) or not isinstance(seq, int) \
+                or not isinstance(links, dict):
+            self.msgs.inc("dropped", "lsa")
+            return
+        if origin == self.id:
+            if seq_newer(seq, self.seq):
+                # anuncio de una vida anterior de este nodo: saltar por encima y re-anunciar
+                self.seq = seq
+                self.lsa_gen.trigger()
+            return
+        cur = self.lsdb.get(origin)
+        if cur is not None and not seq_newer(seq, cur["seq"]):
+            self.msgs.inc("duplicate", "lsa")
+            if seq != cur["seq"]:
+                await self._reply_newer(origin, cur, m.get("prev_hop") or origin)
+            return
+        try:
+            new = {v: int(w) for v, w in links.items() if is_valid_id(v)}
+        except (TypeError, ValueError):
+            self.msgs.inc("dropped", "lsa")
+            return
+        self._store_lsa(origin, seq, new)
+        prev = m.get("prev_hop")
+        fwd = dict(m, prev_hop=self.id)
+        await self._flood(fwd, prev_hop=prev)
+
+    async def _reply_newer(self, origin:str, cur:Dict[str,Any], dst:str):
+        # quien mandó una copia más vieja (p.ej. el origen que reinició sin snapshot) recibe
+        # la nuestra: el origen salta por encima de su seq y re-anuncia
+        if dst not in self.neighbors:
+            return
+        try:
+            await self.send(dst, {"type": "lsa", "from": origin, "seq": cur["seq"],
+                                  "links": cur["links"], "prev_hop": self.id})
+        except Exception as e:
+            self.log.warning("error lsa: %s", e, event="error")
+
+    def _store_lsa(self, origin:str, seq:int, new:Dict[str,int], rx:Optional[float]=None):
+        cur = self.lsdb.get(origin)
+        self.lsdb[origin] = {"seq": seq, "links": new, "rx": now_ms() / 1000 if rx is None else rx}
+        self._touch_first_seen(origin)
+        old = cur["links"] if cur else {}
+        for v in old:
+            if v not in new:
+                self._del_edge(origin, v)  # retirado
+        for v, w in new.items():
+            self._touch_first_seen(v)
+            self._set_edge(origin, v, w, with_timer=False)
+        if cur is None and origin in self._heard:
+            self._sync_ig(self.id, origin)  # ya no es legacy: vale lo que anuncie
 
+    def _age_out(self, now:float) -> List[str]:
+        """
+        Purga los anuncios que su origen dejó de refrescar (LSP_MAX_AGE) y las aristas
+        legacy restauradas que nadie confirmó en ese plazo; devuelve los orígenes.
+        """
+        dead = [o for o, rec in self.lsdb.items() if now - rec["rx"] > LSP_MAX_AGE]
+        for o in dead:
+            for v in self.lsdb.pop(o)["links"]:
+                self._del_edge(o, v)
+            self._sync_ig(self.id, o)
+        stale = [e for e in self._restored_edges if now - self._edge_rx.get(e, 0) > LSP_MAX_AGE]
+        for u, v in stale:
+            self._restored_edges.discard((u, v))
+            self.edge_cache.pop((u, v), None)
+            self._edge_rx.pop((u, v), None)
+            if v not in self.lsdb.get(u, {}).get("links", {}):
+                self._del_edge(u, v)  # salvo que la siga anunciando un lsa
+            dead.append(f"{u}->{v}")
+        return dead
+
+    # ---------- snapshot (arranque en caliente) ----------
+    def _snapshot_state(self) -> Dict[str,Any]:
+        state = {"seq": self.seq, "edges": sorted([u, v, w, self._edge_rx.get((u, v), 0)]
+                                                  for (u, v), w in self.edge_cache.items())}
+        for origin, rec in self.lsdb.items():
+            state["lsa/" + origin] = rec
+        return state
+
+    def _restore(self):
+        ts, state = self.snapshot.load()
+        now = now_ms() / 1000
+        if ts is None or now - ts > SNAPSHOT_MAX_AGE:
+            return
+        self.seq = state.get("seq", 0)
+        # cada anuncio / arista con su hora de llegada: lo que ya pasó de LSP_MAX_AGE no vuelve
+        # (snapshots sin hora de llegada: la del snapshot)
+        for u, v, w, *rx in state.get("edges", ()):
+            rx = rx[0] if rx else ts
+            if self.id not in (u, v) and now - rx <= LSP_MAX_AGE:
+                self.edge_cache[(u, v)] = w
+                self._edge_rx[(u, v)] = rx
+                self._restored_edges.add((u, v))
+                self._touch_first_seen(u)
+                self._set_edge(u, v, w, with_timer=False)
+        for k, rec in state.items():
+            if k.startswith("lsa/") and k[4:] != self.id and now - rec.get("rx", ts) <= LSP_MAX_AGE:
+                self._store_lsa(k[4:], rec["seq"], rec["links"], rec.get("rx", ts))
+        self.log.info("snapshot restaurado (%.0fs): %d anuncios, %d aristas", now_ms() / 1000 - ts,
+                      len(self.lsdb), len(self.edge_cache))
+
+    async def _checkpoint_loop(self):
+        while not self._stop.is_set():
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            try:
+                self.snapshot.checkpoint(self._snapshot_state(), now_ms() / 1000)
+            except OSError as e:
+                self.log.warning("snapshot: %s", e, event="error")
+
+    # ---------- SPF ----------
     def dijkstra(self, src:str):
-        G = self._build_graph()
-        nodes = set(G.keys())
-        for u in list(G.keys()):
-            nodes.update(G[u].keys())
-        dist = {n: math.inf for n in nodes}
-        prev = {n: None for n in nodes}
-        dist[src] = 0.0
-        unvisited = set(nodes)
-        while unvisited:
-            u = min(unvisited, key=lambda n: dist.get(n, math.inf))
-            unvisited.remove(u)
-            for v,w in G.get(u, {}).items():
-                alt = dist[u] + w
-                if alt < dist.get(v, math.inf):
-                    dist[v] = alt
-                    prev[v] = u
+        """SPF sobre el grafo indexado; devuelve dist/prev por id (math.inf / None si no hay ruta)."""
+        dist_a, prev_a = self.IG.spf(src)
+        ids = self.IG.ids
+        dist, prev = {}, {}
+        for i, u in enumerate(ids):
+            if not self.IG.live(i):
+                continue
+            dist[u] = dist_a[i]
+            prev[u] = ids[prev_a[i]] if prev_a[i] >= 0 else None
         return dist, prev
 
+    def _spt(self):
+        """SPT desde self.id como arreglos (dist, prev); se recalcula solo si cambió graph_version."""
+        if self._spt_version != self.graph_version:
+            with self._spf_hist.time_ms():
+                dist, prev = self.IG.spf(self.id)
+            old_d, old_p = self._spt_dist, self._spt_prev
+            changed = sum(1 for i in range(len(old_d)) if old_d[i] != dist[i] or old_p[i] != prev[i])
+            changed += sum(1 for i in range(len(old_d), len(dist)) if dist[i] != math.inf)
+            if changed:
+                self._route_changes.inc(changed)
+            self._spt_dist, self._spt_prev = dist, prev
+            self._spt_version = self.graph_version
+        return self._spt_dist, self._spt_prev
+
     def _path_info(self, target:str):
         """
-        Calcula ruta más corta desde self.id hasta target.
+        Ruta más corta desde self.id hasta target, leída del SPT cacheado.
         Devuelve: hops, cost, first_hop, path
         """
-        # construir grafito directo (por si alguien llama antes)
-        G = self._build_graph()
-        if self.id not in G:
+        if self.id not in self.G:
             return None, None, None, []
-        # Dijkstra manual con heap
-        import heapq
-        dist = {self.id: 0}
-        prev = {}
-        Q = [(0, self.id)]
-
-        visited = set()
-        while Q:
-            d,u = heapq.heappop(Q)
-            if u in visited:
-                continue
-            visited.add(u)
-            if u == target:
-                break
-            for v,ent in self.G.get(u, {}).items():
-                w = ent.get("weight", 1)
-                nd = d + w
-                if nd < dist.get(v, 1e18):
-                    dist[v] = nd
-                    prev[v] = u
-                    heapq.heappush(Q, (nd, v))
-
-        if target not in dist:
+        dist, prev = self._spt()
+        t = self.IG.index.get(target)
+        if t is None or dist[t] == math.inf:
             return None, None, None, []
 
         # reconstruir path
-        path = []
-        u = target
-        while True:
-            path.append(u)
-            if u == self.id:
-                break
-            u = prev.get(u)
-            if u is None:
-                # no hay cadena completa
-                return None, None, None, []
+        ids = self.IG.ids
+        path = [target]
+        u = t
+        while prev[u] >= 0:
+            u = prev[u]
+            path.append(ids[u])
         path.reverse()
 
         hops = len(path)-1
-        cost = dist[target]
+        cost = dist[t]
         first = path[1] if hops >= 1 else None
         return hops, cost, first, path
 
     # ---------- start ----------
     async def start(self):
-        self.r = await redis.from_url(
-            f"redis://{REDIS_HOST}:{REDIS_PORT}",
-            password=REDIS_PASSWORD, decode_responses=True
-        )
-        self.pubsub = self.r.pubsub()
+        if self.transport is None:
+            self.transport = RedisTransport(REDIS_HOST, REDIS_PORT, REDIS_PASSWORD)
+        await self.transport.connect()
+        self.outbox = Outbox(self.transport)
+        self.outbox.latency = self.metrics.histogram("publish_latency_ms", node=self.id)
         channels = [self._channel_for(self.id)] + [self._channel_for(v) for v in self.neighbors]
-        await self.pubsub.subscribe(*channels)
-        log(self.id, f"up @ redis={REDIS_HOST}:{REDIS_PORT} | neighbors={list(self.neighbors.items())}")
+        await self.transport.subscribe(*channels)
+        self.log.info("up @ %s | neighbors=%s", self.transport.describe(), list(self.neighbors.items()))
+        if self.snapshot is not None:
+            self._restore()
         for v,w in self.neighbors.items():
             self._touch_first_seen(v)
             # inicializa last_hello para no “cortar” al arranque
             self.node_meta[v]["last_hello_ms"] = now_ms()
             self._set_edge(self.id, v, w, with_timer=True)
-        await self._propagate_local_links()
+        # el lsa propio sale al oír el primer hello de cada vecino (antes nadie lo recibiría)
 
         loops = [
             asyncio.create_task(self._hello_loop()),
             asyncio.create_task(self._decay_loop()),
             asyncio.create_task(self._recv_loop())
         ]
+        if self.snapshot is not None:
+            loops.append(asyncio.create_task(self._checkpoint_loop()))
         try:
             await asyncio.gather(*loops)
         finally:
-            await self.pubsub.close()
-            await self.r.aclose()
+            self.lsa_gen.cancel()
+            await self.outbox.close()
+            await self.transport.close()
 
     async def _recv_loop(self):
+        """
+        Lector (push) -> cola acotada -> manejador. El lector decodifica en cuanto
+        llega cada mensaje; si el manejador se atrasa, la cola llena frena al
+        lector (backpressure) en vez de acumular sin límite.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=RECV_QUEUE_SIZE)
+        self.recv_queue = queue
+        reader = asyncio.create_task(self._reader(queue))
+        try:
+            while not self._stop.is_set():
+                data = await queue.get()
+                try:
+                    mtype = data.get("type")
+                    prev_hop = data.get("prev_hop")
+                    if mtype == "hello":
+                        await self._on_hello(data)
+                    elif mtype == "message":
+                        await self._on_message(data, prev_hop=prev_hop)
+                    elif mtype == "lsa":
+                        await self._on_lsa(data)
+                    else:
+                        self.msgs.inc("dropped", mtype)
+                except Exception as e:
+                    self.log.warning("recv error: %s", e, event="error")
+        finally:
+            reader.cancel()
+
+    async def _reader(self, queue:asyncio.Queue):
         while not self._stop.is_set():
             try:
-                msg = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if not msg:
-                    await asyncio.sleep(0.1); continue
-                data = json.loads(msg["data"])
-                mtype = data.get("type")
-                prev_hop = data.get("prev_hop")
-                if mtype == "hello":
-                    await self._on_hello(data)
-                elif mtype == "message":
-                    await self._on_message(data, prev_hop=prev_hop)
+                async for raw in self.transport.listen():
+                    try:
+                        data = self.codec.decode(raw)
+                    except Exception as e:
+                        self.msgs.inc("dropped", "undecodable")
+                        self.log.warning("decode error: %s", e, event="decode")
+                        continue
+                    self.msgs.inc("in", data.get("type"))
+                    await queue.put(data)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                log(self.id, "recv error:", e)
+                # conexión caída: reintenta la suscripción
+                self.log.warning("recv error: %s", e, event="error")
                 await asyncio.sleep(0.2)
 
 # CLI
@@ -352,19 +601,36 @@ def load_json(p):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--id", required=True, help="ID: sec30.grupoX.nodoY")
-    ap.add_argument("--topo", required=True, help="Archivo JSON de topología")
+    ap.add_argument("--topo", required=True, help="Archivo JSON de topología (o compilada, ver src/tools/compile_topology.py)")
     ap.add_argument("--show-table", action="store_true", help="Imprime tabla enriquecida")
     ap.add_argument("--dijkstra", default=None, help="Destino para mostrar costo/primer salto")
+    ap.add_argument("--table-refresh", type=float, default=30.0,
+                    help="Con --show-table: reimprime cada N s aunque el grafo no cambie (time_left, up); 0 = solo con cambios")
+    add_metrics_args(ap)
     args = ap.parse_args()
 
-    topo = load_json(args.topo)["config"]
-    node = Sec30Node(args.id, topo)
+    if is_compiled(args.topo):
+        ct = CompiledTopology(args.topo)
+        node = Sec30Node(args.id, {args.id: ct.neighbors(args.id)}, ids=ct.ids.all())
+    else:
+        topo = load_json(args.topo)["config"]
+        node = Sec30Node(args.id, topo)
 
     async def runner():
+        setup_logging()
+        start_exporters(args)
         if args.show_table:
             async def printer():
+                # cada 5 s si cambió el grafo (graph_version); si no, cada --table-refresh s
+                # para que time_left y up no queden congelados
+                shown, shown_at = None, 0.0
                 while True:
                     await asyncio.sleep(5)
+                    now = time.monotonic()
+                    stale = args.table_refresh > 0 and now - shown_at >= args.table_refresh
+                    if node.graph_version == shown and not stale:
+                        continue
+                    shown, shown_at = node.graph_version, now
                     lines = []
                     lines.append("==== VECINOS (hello) ====")
                     for v, ent in sorted(node.G.get(node.id, {}).items()):
@@ -401,7 +667,7 @@ def main():
                         )
                     lines.append("==== NO VECINOS (vía flooding) ====")
                     lines.extend(sorted(others))
-                    print("[" + node.id + "]\n" + "\n".join(lines), flush=True)
+                    node.log.info("\n%s", "\n".join(lines))
             asyncio.create_task(printer())
 
         if args.dijkstra:
@@ -411,10 +677,10 @@ def main():
                     dest = args.dijkstra
                     hops, total_cost, first, path = node._path_info(dest)
                     if total_cost is None:
-                        log(node.id, f"SPF to {dest}: sin ruta conocida (aún)")
+                        node.log.info("SPF to %s: sin ruta conocida (aún)", dest)
                     else:
                         path_str = "->".join(path) if path else "-"
-                        log(node.id, f"SPF to {dest}: hops={hops}, cost={total_cost}, next={first}, path={path_str}")
+                        node.log.info("SPF to %s: hops=%s, cost=%s, next=%s, path=%s", dest, hops, total_cost, first, path_str)
             asyncio.create_task(dij())
 
         await node.start()
@@ -0,0 +1,278 @@
+import asyncio, math, selectors, random, time, uuid
+from typing import Dict, Any, List, Optional
+from .core.utils import set_clock, make_msg, now_ms
+from .core.protocol import Codec
+from .core.transport import LoopbackBus, LoopbackTransport
+from .node import Node
+from .sec30_node import Sec30Node
+
+# ---------- reloj virtual ----------
+class _VirtualSelector(selectors.BaseSelector):
+    """Selector que, en vez de bloquear `timeout` segundos, adelanta el reloj virtual."""
+    def __init__(self, loop:"VirtualTimeLoop"):
+        self._real = selectors.DefaultSelector()
+        self._loop = loop
+
+    def register(self, fileobj, events, data=None):
+        return self._real.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._real.unregister(fileobj)
+
+    def select(self, timeout=None):
+        events = self._real.select(0)
+        if not events and timeout:
+            self._loop.advance(timeout)
+        return events
+
+    def get_map(self):
+        return self._real.get_map()
+
+    def close(self):
+        self._real.close()
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop con tiempo virtual: sleep/call_later/wait_for no esperan de verdad,
+    el reloj salta al siguiente timer en cuanto no hay nada listo para correr.
+    """
+    def __init__(self, start:float=0.0):
+        self._vtime = start
+        super().__init__(selector=_VirtualSelector(self))
+
+    def time(self):
+        return self._vtime
+
+    def advance(self, dt:float):
+        self._vtime += dt
+
+
+# ---------- red simulada ----------
+class SimBus(LoopbackBus):
+    """
+    LoopbackBus con enlaces simulados: cada entrega se agenda tras
+    delay = base + weight*per_weight + U(0, jitter) (ms) y se pierde con prob. `loss`.
+    Cuenta mensajes/bytes por tipo.
+    """
+    def __init__(self, topology:Dict[str, Dict[str,int]], delay_ms:float=5.0, jitter_ms:float=0.0,
+                 per_weight_ms:float=0.0, loss:float=0.0, seed:Optional[int]=None):
+        super().__init__()
+        self.topology = topology
+        self.delay_ms, self.jitter_ms, self.per_weight_ms, self.loss = delay_ms, jitter_ms, per_weight_ms, loss
+        self.rng = random.Random(seed)
+        ids = set(topology)
+        for nbrs in topology.values():
+            ids.update(nbrs)
+        self.codec = Codec(ids)
+        self.sent: Dict[str, int] = {}
+        self.bytes = 0
+        self.dropped = 0
+
+    def transport(self, owner:Optional[str]=None) -> "SimTransport":
+        return SimTransport(self, owner)
+
+    def _delay(self, a:Optional[str], b:Optional[str]) -> float:
+        w = self.topology.get(a, {}).get(b, 0) if a and b else 0
+        d = self.delay_ms + w * self.per_weight_ms
+        if self.jitter_ms:
+            d += self.rng.uniform(0, self.jitter_ms)
+        return d / 1000.0
+
+    def deliver_from(self, sender:Optional[str], channel:str, data) -> int:
+        try:
+            mtype = self.codec.decode(data).get("type", "?")
+        except Exception:
+            mtype = "?"
+        self.sent[mtype] = self.sent.get(mtype, 0) + 1
+        self.bytes += len(data)
+        loop = asyncio.get_running_loop()
+        subs = self.subscribers.get(channel, ())
+        for t in subs:
+            if self.loss and self.rng.random() < self.loss:
+                self.dropped += 1
+                continue
+            loop.call_later(self._delay(sender, t.owner), t.queue.put_nowait, data)
+        return len(subs)
+
+
+class SimTransport(LoopbackTransport):
+    def __init__(self, bus:SimBus, owner:Optional[str]):
+        super().__init__(bus)
+        self.owner = owner
+
+    async def publish(self, channel:str, data) -> int:
+        return self.bus.deliver_from(self.owner, channel, data)
+
+    async def publish_many(self, items) -> int:
+        return sum(self.bus.deliver_from(self.owner, ch, d) for ch, d in items)
+
+    def describe(self) -> str:
+        return "sim"
+
+
+# ---------- nodos instrumentados ----------
+class SimNode(Node):
+    def __init__(self, sim:"Simulation", *a, **kw):
+        super().__init__(*a, **kw)
+        self.sim = sim
+
+    async def _handle_message(self, msg:Dict[str,Any]):
+        if msg.get("type") == "message" and msg.get("to") == self.id:
+            self.sim.on_delivery(self.id, msg)
+        await super()._handle_message(msg)
+
+    def _recompute_tables(self):
+        old = self.routing_table
+        super()._recompute_tables()
+        if self.routing_table != old:
+            self.sim.on_route_change()
+
+
+# ---------- topologias ----------
+def random_topology(n:int, degree:float=3.0, seed:Optional[int]=None, wmin:int=1, wmax:int=20,
+                    prefix:str="N") -> Dict[str, Dict[str,int]]:
+    """Grafo conexo no dirigido: arbol aleatorio + aristas extra hasta ~degree de grado medio."""
+    rng = random.Random(seed)
+    name = (lambda i: f"sec30.grupo{i}.nodo{i}") if prefix == "sec30" else (lambda i: f"{prefix}{i}")
+    ids = [name(i) for i in range(1, n + 1)]
+    topo: Dict[str, Dict[str,int]] = {u: {} for u in ids}
+    def link(a, b):
+        w = rng.randint(wmin, wmax)
+        topo[a][b] = w; topo[b][a] = w
+    for i in range(1, n):
+        link(ids[i], ids[rng.randrange(i)])
+    extra = max(0, int(n * degree / 2) - (n - 1))
+    for _ in range(extra * 4):
+        if extra <= 0:
+            break
+        a, b = rng.sample(ids, 2)
+        if b not in topo[a]:
+            link(a, b); extra -= 1
+    return topo
+
+
+def _percentile(xs:List[float], p:float):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+# ---------- simulacion ----------
+class Simulation:
+    """
+    Corre la logica real de Node (flooding/dvr/lsr) o Sec30Node sobre un SimBus
+    en tiempo virtual. run() devuelve un resumen: convergencia, mensajes, entregas, CPU.
+    """
+    def __init__(self, topology:Dict[str, Dict[str,int]], kind:str="node", proto:str="lsr",
+                 duration:float=60.0, warmup:Optional[float]=None, data_messages:int=20,
+                 seed:Optional[int]=None, **link):
+        self.topology = topology
+        self.kind, self.proto = kind, proto
+        self.duration = duration
+        self.warmup = duration / 2 if warmup is None else warmup
+        self.data_messages = data_messages
+        self.rng = random.Random(seed)
+        self.bus = SimBus(topology, seed=seed, **link)
+        self.nodes: List[Any] = []
+        self.last_change = 0.0
+        self.sent_data: Dict[str, float] = {}       # id -> t envio (s virtuales)
+        self.deliveries: Dict[str, List[float]] = {}  # id -> latencias (s)
+
+    def now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def on_route_change(self):
+        self.last_change = self.now()
+
+    def on_delivery(self, node_id:str, msg:Dict[str,Any]):
+        mid = None
+        for h in msg.get("headers", []):
+            if "id" in h: mid = h["id"]
+        if mid in self.sent_data:
+            self.deliveries.setdefault(mid, []).append(self.now() - self.sent_data[mid])
+
+    def _build(self):
+        ids = sorted(self.topology)
+        if self.kind == "sec30":
+            for u in ids:
+                self.nodes.append(Sec30Node(u, self.topology, transport=self.bus.transport(u)))
+        else:
+            names = {u: u for u in ids}
+            for u in ids:
+                n = SimNode(self, u, self.proto, self.topology[u], names, transport=self.bus.transport(u))
+                n.flood.seen.clock = asyncio.get_running_loop().time
+                self.nodes.append(n)
+
+    async def _watch_sec30(self, every:float=0.1):
+        last = None
+        while True:
+            cur = sum(n.graph_version for n in self.nodes)
+            if cur != last:
+                last = cur
+                self.last_change = self.now()
+            await asyncio.sleep(every)
+
+    async def _inject(self):
+        await asyncio.sleep(self.warmup)
+        ids = [n.id for n in self.nodes]
+        for _ in range(self.data_messages):
+            src, dst = self.rng.sample(ids, 2)
+            mid = str(uuid.uuid4())
+            m = make_msg(self.proto, "message", src, dst, headers=[{"id": mid}], payload={"text": "sim"})
+            self.sent_data[mid] = self.now()
+            await self.bus.transport(None).publish(src, self.bus.codec.encode(m))
+            await asyncio.sleep(0.01)
+
+    async def _main(self):
+        self._build()
+        for n in self.nodes:
+            asyncio.ensure_future(n.start())
+        if self.kind == "sec30":
+            asyncio.ensure_future(self._watch_sec30())
+        elif self.data_messages:
+            asyncio.ensure_future(self._inject())
+        await asyncio.sleep(self.duration)
+        # Node.start lanza sus loops con create_task: cancelar todo lo que quede vivo
+        rest = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in rest:
+            t.cancel()
+        await asyncio.gather(*rest, return_exceptions=True)
+
+    def run(self) -> Dict[str, Any]:
+        loop = VirtualTimeLoop()
+        set_clock(loop.time)
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        try:
+            loop.run_until_complete(self._main())
+        finally:
+            set_clock()
+            loop.close()
+        return self.summary(time.process_time() - cpu0, time.perf_counter() - wall0)
+
+    def summary(self, cpu:float, wall:float) -> Dict[str, Any]:
+        edges = sum(len(v) for v in self.topology.values()) // 2
+        out: Dict[str, Any] = {
+            "kind": self.kind, "proto": self.proto if self.kind == "node" else "sec30",
+            "nodes": len(self.topology), "edges": edges, "virtual_s": self.duration,
+            "converged_at_s": round(self.last_change, 3),
+            "messages": dict(sorted(self.bus.sent.items())), "bytes": self.bus.bytes,
+            "lost": self.bus.dropped, "cpu_s": round(cpu, 3), "wall_s": round(wall, 3),
+        }
+        if self.kind == "node" and self.sent_data:
+            lat = [min(v) for v in self.deliveries.values()]
+            out["data"] = {
+                "sent": len(self.sent_data), "delivered": len(self.deliveries),
+                "duplicates": sum(len(v) - 1 for v in self.deliveries.values()),
+                "p50_ms": None if not lat else round(_percentile(lat, 0.5) * 1000, 2),
+                "p99_ms": None if not lat else round(_percentile(lat, 0.99) * 1000, 2),
+            }
+        if self.kind == "node" and self.proto in ("lsr", "dvr"):
+            out["complete"] = all(len([d for d in n.routing_table if d != n.id]) == len(self.nodes) - 1
+                                  for n in self.nodes)
+        elif self.kind == "sec30":
+            reach = [sum(1 for d in n._spt()[0] if d != math.inf) - 1 for n in self.nodes]
+            out["complete"] = all(r == len(self.nodes) - 1 for r in reach)
+            out["reachable_min"] = min(reach, default=0)
+        return out
@@ -0,0 +1,24 @@
+import argparse, json, time
+from pathlib import Path
+from ..core.topology import compile_topology, CompiledTopology
+
+def main():
+    ap = argparse.ArgumentParser(description="Compila topology_*.json (+ names) al formato binario indexado")
+    ap.add_argument("topo", help="Path to topology JSON")
+    ap.add_argument("--names", help="Path to names JSON (canales de Node)")
+    ap.add_argument("-o", "--out", help="Archivo de salida (por defecto, el JSON con extensión .topo)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    topo = json.loads(Path(args.topo).read_text(encoding="utf-8"))["config"]
+    names = json.loads(Path(args.names).read_text(encoding="utf-8"))["config"] if args.names else None
+    out = args.out or str(Path(args.topo).with_suffix(".topo"))
+    Path(out).write_bytes(compile_topology(topo, names))
+
+    ct = CompiledTopology(out)
+    print(f"{out}: {len(ct.ids)} nodos, {ct.edges} adyacencias, nombres={'sí' if ct.names else 'no'}, "
+          f"{Path(out).stat().st_size} bytes ({time.perf_counter() - t0:.2f}s)")
+    ct.close()
+
+if __name__ == "__main__":
+    main()
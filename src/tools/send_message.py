@@ -1,20 +1,227 @@
-import argparse, json, asyncio
-import redis.asyncio as redis
-import os
-from ..core.utils import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, TTL_DEFAULT
-from ..core.protocol import encode
+import argparse, json, asyncio, math, random, time, uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..core.utils import TTL_DEFAULT, make_msg
+from ..core.protocol import make_codec
+from ..core.transport import RedisTransport, Transport
+
+Pair = Tuple[str, str]
+
+def _ms() -> float:
+    return round(time.time() * 1000, 3)
+
+def percentile(xs:Sequence[float], q:float) -> Optional[float]:
+    """Rango más cercano sobre xs ya ordenada."""
+    if not xs:
+        return None
+    return xs[min(len(xs), max(1, math.ceil(q * len(xs)))) - 1]
+
+class LoadGen:
+    """
+    Generador de carga: inyecta mensajes de datos en el canal del origen con
+    `payload.probe = {"run", "seq", "ts", "report"}`; el nodo destino contesta
+    con un `report` directo al canal `report` (ver Node._report_delivery).
+    Latencias: `rtt` con el reloj del generador (envío -> llega el reporte) y
+    `one_way` con el reloj del destino (resolución de 1 ms; requiere relojes sincronizados).
+    """
+    def __init__(self, transport:Transport, names:Dict[str,str], proto:str, pairs:Sequence[Pair],
+                 ttl:int=TTL_DEFAULT, seed:Optional[int]=None):
+        self.transport = transport
+        self.names = names
+        self.proto = proto
+        self.pairs = list(pairs)
+        self.ttl = ttl
+        self.rng = random.Random(seed)
+        self.codec = make_codec(names.keys())
+        self.run = uuid.uuid4().hex[:12]
+        self.report_channel = f"loadgen.{self.run}"
+        self.seq = 0
+        self.sent: Dict[int, float] = {}      # seq -> ts de envío
+        self.rtt: Dict[int, float] = {}       # seq -> ms (primera entrega)
+        self.one_way: List[float] = []
+        self.duplicates = 0
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.transport.connect()
+        await self.transport.subscribe(self.report_channel)
+        self._reader = asyncio.create_task(self._read_reports())
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self.transport.close()
+
+    def _probe(self, pair:Pair) -> Tuple[int, str, bytes]:
+        src, dst = pair
+        self.seq += 1
+        ts = _ms()
+        probe = {"run": self.run, "seq": self.seq, "ts": ts, "report": self.report_channel}
+        # el id deduplica las copias en flooding; flow fija el camino del par con ECMP
+        msg = make_msg(self.proto, "message", src, dst, ttl=self.ttl,
+                       headers=[{"id": f"{self.run}-{self.seq}"}, {"flow": f"{src}>{dst}"}],
+                       payload={"probe": probe})
+        self.sent[self.seq] = ts
+        return self.seq, self.names[src], self.codec.encode(msg)
+
+    async def send_batch(self, n:int) -> List[int]:
+        items = [self._probe(self.rng.choice(self.pairs)) for _ in range(n)]
+        await self.transport.publish_many([(ch, data) for _, ch, data in items])
+        return [seq for seq, _, _ in items]
+
+    async def _read_reports(self):
+        async for raw in self.transport.listen():
+            try:
+                m = self.codec.decode(raw)
+                probe = m["payload"]["probe"]
+                if m.get("type") != "report" or probe.get("run") != self.run:
+                    continue
+                seq = probe["seq"]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            if seq in self.rtt:
+                self.duplicates += 1
+                continue
+            self.rtt[seq] = _ms() - probe["ts"]
+            if "recv_ms" in m["payload"]:
+                self.one_way.append(m["payload"]["recv_ms"] - probe["ts"])
+            w = self._waiters.pop(seq, None)
+            if w is not None and not w.done():
+                w.set_result(None)
+
+    async def run_rate(self, rate:float, duration:float):
+        """Lazo abierto: `rate` mensajes/s durante `duration` s (lo atrasado sale en un solo lote)."""
+        t0 = time.perf_counter()
+        done = 0
+        while True:
+            elapsed = time.perf_counter() - t0
+            if elapsed >= duration:
+                break
+            due = int(elapsed * rate) + 1 - done
+            if due > 0:
+                await self.send_batch(due)
+                done += due
+            await asyncio.sleep(max(0.0, done / rate - (time.perf_counter() - t0)))
+
+    async def run_closed(self, concurrency:int, duration:float, timeout:float):
+        """Lazo cerrado: `concurrency` mensajes en vuelo; cada uno sale al entregarse (o vencer) el anterior."""
+        loop = asyncio.get_running_loop()
+        deadline = time.perf_counter() + duration
+        async def worker():
+            while time.perf_counter() < deadline:
+                fut = loop.create_future()
+                seq = self.seq + 1
+                self._waiters[seq] = fut
+                await self.send_batch(1)
+                try:
+                    await asyncio.wait_for(fut, timeout)
+                except asyncio.TimeoutError:
+                    self._waiters.pop(seq, None)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def drain(self, timeout:float):
+        """Espera los reportes que faltan, hasta `timeout` s."""
+        end = time.perf_counter() + timeout
+        while len(self.rtt) < len(self.sent) and time.perf_counter() < end:
+            await asyncio.sleep(0.05)
+
+    def summary(self, elapsed:float) -> Dict[str, object]:
+        rtt = sorted(self.rtt.values())
+        one_way = sorted(self.one_way)
+        def q(xs, p):
+            v = percentile(xs, p)
+            return None if v is None else round(v, 3)
+        return {
+            "proto": self.proto, "run": self.run, "pairs": len(self.pairs), "elapsed_s": round(elapsed, 3),
+            "sent": len(self.sent), "delivered": len(rtt), "lost": len(self.sent) - len(rtt),
+            "duplicates": self.duplicates,
+            "loss": round((len(self.sent) - len(rtt)) / max(1, len(self.sent)), 4),
+            "throughput_msg_s": round(len(rtt) / max(elapsed, 1e-9), 1),
+            "rtt_ms": {"p50": q(rtt, 0.5), "p99": q(rtt, 0.99), "max": q(rtt, 1.0)},
+            "one_way_ms": {"p50": q(one_way, 0.5), "p99": q(one_way, 0.99), "max": q(one_way, 1.0)},
+        }
+
+
+def make_pairs(ids:Sequence[str], n:int, rng:random.Random, src:Optional[str]=None) -> List[Pair]:
+    """n pares distintos al azar (todos con origen `src` si se da)."""
+    ids = sorted(ids)
+    if len(ids) < 2:
+        raise SystemExit("hacen falta al menos 2 nodos para generar pares")
+    if src is not None:
+        dsts = [i for i in ids if i != src]
+        return [(src, d) for d in sorted(rng.sample(dsts, min(n, len(dsts))))]
+    pairs = set()
+    while len(pairs) < min(n, len(ids) * (len(ids) - 1)):
+        a, b = rng.sample(ids, 2)
+        pairs.add((a, b))
+    return sorted(pairs)
+
+async def load(args, names:Dict[str,str]):
+    rng = random.Random(args.seed)
+    if args.src and args.dst:
+        pairs = [(args.src, args.dst)]
+    else:
+        pairs = make_pairs(names, args.pairs, rng, src=args.src)
+    gen = LoadGen(RedisTransport(), names, args.proto, pairs, ttl=args.ttl, seed=args.seed)
+    await gen.start()
+    try:
+        t0 = time.perf_counter()
+        if args.concurrency:
+            await gen.run_closed(args.concurrency, args.duration, args.timeout)
+        else:
+            await gen.run_rate(args.rate, args.duration)
+        elapsed = time.perf_counter() - t0
+        await gen.drain(args.timeout)
+    finally:
+        await gen.close()
+    summary = gen.summary(elapsed)
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        # una línea por corrida: varias corridas (una por protocolo) se comparan con --compare
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+
+def compare(path:str):
+    rows = [json.loads(l) for l in open(path, "r", encoding="utf-8") if l.strip()]
+    print(f"{'proto':10} {'sent':>8} {'deliv':>8} {'loss':>7} {'dup':>6} {'msg/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in rows:
+        lat = r["rtt_ms"]
+        print(f"{r['proto']:10} {r['sent']:8} {r['delivered']:8} {r['loss']:7.2%} {r['duplicates']:6} "
+              f"{r['throughput_msg_s']:9.1f} {lat['p50'] if lat['p50'] is not None else '-':>9} "
+              f"{lat['p99'] if lat['p99'] is not None else '-':>9}")
 
 async def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--from", dest="src", required=True)
-    ap.add_argument("--to", dest="dst", required=True)
-    ap.add_argument("--text", required=True)
+    ap.add_argument("--from", dest="src")
+    ap.add_argument("--to", dest="dst")
+    ap.add_argument("--text")
     ap.add_argument("--proto", default="lsr")
-    ap.add_argument("--names", required=True)
+    ap.add_argument("--names")
     ap.add_argument("--ttl", type=int, default=TTL_DEFAULT)
+    lg = ap.add_argument_group("generador de carga (--load)")
+    lg.add_argument("--load", action="store_true", help="Generar carga en vez de un solo mensaje")
+    lg.add_argument("--rate", type=float, default=100.0, help="Mensajes/s (lazo abierto)")
+    lg.add_argument("--concurrency", type=int, default=0, help="Mensajes en vuelo (lazo cerrado; ignora --rate)")
+    lg.add_argument("--duration", type=float, default=10.0, help="Segundos enviando")
+    lg.add_argument("--pairs", type=int, default=20, help="Pares origen/destino al azar (sin --from/--to)")
+    lg.add_argument("--timeout", type=float, default=5.0, help="Espera máxima de un reporte (s)")
+    lg.add_argument("--seed", type=int, default=None)
+    lg.add_argument("--out", help="Agregar el resumen (JSON por línea) a este archivo")
+    lg.add_argument("--compare", metavar="FILE", help="Tabla comparativa de los resúmenes en FILE y salir")
     args = ap.parse_args()
 
+    if args.compare:
+        compare(args.compare)
+        return
+    if not args.names:
+        ap.error("--names es obligatorio")
     names = json.loads(open(args.names, "r", encoding="utf-8").read())["config"]
+    if args.load:
+        await load(args, names)
+        return
+    if not (args.src and args.dst and args.text):
+        ap.error("--from, --to y --text son obligatorios sin --load")
     ch = names[args.src]
 
     msg = {
@@ -27,9 +234,9 @@ async def main():
         "payload": {"text": args.text}
     }
 
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD)
-    await r.publish(ch, json.dumps(msg))
-    await r.close()
+    t = RedisTransport()
+    await t.publish(ch, make_codec(names.keys()).encode(msg))
+    await t.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
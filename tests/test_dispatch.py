@@ -0,0 +1,49 @@
+import asyncio, random
+from src.core.dispatch import KeyedDispatcher
+
+def test_same_key_keeps_order():
+    rng = random.Random(3)
+    seen = {}
+    async def handler(item):
+        key, i = item
+        await asyncio.sleep(rng.random() / 1000)  # los workers se intercalan
+        seen.setdefault(key, []).append(i)
+    async def run():
+        d = KeyedDispatcher(handler, workers=4, maxsize=8)
+        d.start()
+        for i in range(50):
+            for key in "ABCDEFG":
+                await d.submit(key, (key, i))
+        await d.close()
+    asyncio.run(run())
+    assert seen == {key: list(range(50)) for key in "ABCDEFG"}
+
+def test_close_drains_queued_items():
+    done = []
+    async def handler(item):
+        await asyncio.sleep(0)
+        done.append(item)
+    async def run():
+        d = KeyedDispatcher(handler, workers=2)
+        d.start()
+        for i in range(20):
+            await d.submit(i, i)
+        await d.close()
+        return d.depth()
+    assert asyncio.run(run()) == 0
+    assert sorted(done) == list(range(20))
+
+def test_errors_do_not_stop_the_worker():
+    done, errors = [], []
+    async def handler(item):
+        if item == 1:
+            raise ValueError(item)
+        done.append(item)
+    async def run():
+        d = KeyedDispatcher(handler, workers=1, on_error=errors.append)
+        d.start()
+        for i in range(3):
+            await d.submit("k", i)
+        await d.close()
+    asyncio.run(run())
+    assert done == [0, 2] and len(errors) == 1
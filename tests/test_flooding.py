@@ -0,0 +1,45 @@
+import asyncio
+from src.algorithms.flooding import SeenCache
+from src.core.metrics import Registry
+from src.core.transport import LoopbackBus
+from src.node import Node
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+    def __call__(self):
+        return self.t
+
+
+def test_lru_evicts_least_recently_used():
+    c = SeenCache(capacity=2, ttl=100, clock=Clock())
+    assert not c.check_and_add("a")
+    assert not c.check_and_add("b")
+    assert c.check_and_add("a")        # "a" pasa a ser el más reciente
+    assert not c.check_and_add("c")    # sale "b"
+    assert "a" in c and "c" in c and "b" not in c
+    assert c.stats() == {"size": 2, "capacity": 2, "hits": 1, "misses": 3, "evictions": 1, "expired": 0}
+
+
+def test_ttl_expires_entries():
+    clock = Clock()
+    c = SeenCache(capacity=10, ttl=5, clock=clock)
+    c.check_and_add("a")
+    clock.t = 3
+    c.check_and_add("b")
+    clock.t = 6                        # "a" venció, "b" no
+    assert "a" not in c and "b" in c
+    assert not c.check_and_add("a")    # vuelve a contar como nuevo
+    assert c.expired == 1 and len(c) == 2
+
+
+def test_seen_stats_in_registry():
+    reg = Registry()
+    async def run():
+        n = Node("A", "flooding", {"B": 1}, {"A": "A", "B": "B"}, transport=LoopbackBus().transport(), metrics=reg)
+        n.flood.should_forward("m1")
+        n.flood.should_forward("m1")
+    asyncio.run(run())
+    snap = {row["labels"]["stat"]: row["value"] for row in reg.snapshot()["flood_seen"]}
+    assert snap == {"size": 1, "hits": 1, "misses": 1, "evictions": 0, "expired": 0}
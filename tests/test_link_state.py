@@ -0,0 +1,28 @@
+from src.algorithms.link_state import LinkState
+
+def build(ecmp_paths, links):
+    ls = LinkState("A", ecmp_paths=ecmp_paths)
+    by_src = {}
+    for u, v, w in links:
+        by_src.setdefault(u, {})[v] = w
+        by_src.setdefault(v, {})[u] = w
+    for src, nbrs in by_src.items():
+        ls.ingest_lsp({"src": src, "seq": 1, "links": nbrs}, now=0.0)
+    return ls.compute_spf()
+
+def test_zero_weight_link_with_ecmp():
+    table = build(4, [("A", "B", 0), ("B", "C", 1)])
+    assert table["B"] == {"cost": 0, "next": "B", "nexts": ["B"]}
+    assert table["C"] == {"cost": 1, "next": "B", "nexts": ["B"]}
+
+def test_zero_weight_chain_matches_single_path():
+    links = [("A", "B", 0), ("B", "C", 0), ("C", "D", 0), ("A", "E", 2), ("E", "D", 0)]
+    multi, single = build(4, links), build(1, links)
+    assert set(multi) == set(single) == {"B", "C", "D", "E"}
+    for d in single:
+        assert multi[d]["cost"] == single[d]["cost"]
+        assert multi[d]["next"] in ("B", "E")
+
+def test_ecmp_equal_cost_paths():
+    table = build(4, [("A", "B", 1), ("A", "C", 1), ("B", "D", 1), ("C", "D", 1)])
+    assert table["D"]["nexts"] == ["B", "C"]
@@ -0,0 +1,33 @@
+import asyncio
+from src.core.transport import LoopbackBus
+from src.core.utils import make_msg
+from src.node import Fib, Node
+
+NAMES = {n: f"ch.{n}" for n in ("A", "B", "C", "D")}
+
+def forward(proto, msg, fib=None):
+    """A (vecinos B y C) reenvía msg que le llegó de D; devuelve lo publicado por canal."""
+    async def run():
+        bus = LoopbackBus()
+        node = Node("A", proto, {"B": 1, "C": 1}, NAMES, transport=bus.transport())
+        node.outbox.window = 0
+        if fib is not None:
+            node.fib = Fib(1, fib)
+        taps = {}
+        for n in ("B", "C"):
+            taps[n] = bus.transport()
+            await taps[n].subscribe(NAMES[n])
+        await node._route_and_forward(msg, "D")
+        return {n: [node.codec.decode(t.queue.get_nowait()) for _ in range(t.queue.qsize())]
+                for n, t in taps.items()}
+    return asyncio.run(run())
+
+def test_table_forwarding_keeps_final_to():
+    msg = make_msg("lsr", "message", "D", "Z", ttl=4, payload={"text": "hola"})
+    out = forward("lsr", msg, fib={"Z": "B"})
+    assert [m["to"] for m in out["B"]] == ["Z"] and out["C"] == []
+
+def test_flooding_keeps_final_to():
+    msg = make_msg("flooding", "message", "D", "Z", ttl=4, headers=[{"id": "m1"}], payload={"text": "hola"})
+    out = forward("flooding", msg)
+    assert [m["to"] for m in out["B"] + out["C"]] == ["Z", "Z"]
@@ -0,0 +1,41 @@
+import pytest
+from src.core.protocol import Codec, F_TABLE, fits_header
+
+IDS = ["A", "B", "C"]
+HELLO = {"type": "hello", "from": "A", "to": "B", "hops": 3}
+DATA = {"proto": "lsr", "type": "message", "from": "A", "to": "C", "ttl": 5,
+        "headers": [], "payload": {"text": "hola"}}
+
+def test_only_header_only_messages_go_binary():
+    c = Codec(IDS, "bin")
+    assert fits_header(HELLO) and not fits_header(DATA)
+    assert isinstance(c.encode(HELLO), bytes)
+    assert c.encode(DATA, "B")[:1] == "{"
+    assert c.decode(c.encode(DATA, "B")) == DATA
+
+def test_unknown_peer_gets_inline_ids():
+    raw = Codec(IDS, "bin").encode(HELLO, "B")
+    assert raw[1] & F_TABLE
+    # una tabla distinta la entiende igual
+    assert Codec(IDS + ["D"], "bin").decode(raw) == HELLO
+
+def test_hello_negotiates_interning():
+    a, b = Codec(IDS, "bin"), Codec(reversed(IDS), "bin")
+    b.decode(a.encode(HELLO, "B"))           # b anota la tabla de A
+    back = {"type": "hello", "from": "B", "to": "A", "hops": 3}
+    raw = b.encode(back, "A")
+    assert len(raw) < len(b.encode(back))    # interna hacia A
+    assert a.decode(raw) == back
+
+def test_other_table_falls_back_to_json():
+    a, d = Codec(IDS, "bin"), Codec(IDS + ["D"], "bin")
+    d.decode(a.encode(HELLO, "D"))
+    back = {"type": "hello", "from": "D", "to": "A", "hops": 1}
+    raw = d.encode(back, "A")
+    assert isinstance(raw, str)
+    assert a.decode(raw) == back
+
+def test_interned_frame_with_other_table_is_rejected():
+    raw = Codec(IDS, "bin").encode_bin(HELLO, intern=True)
+    with pytest.raises(ValueError):
+        Codec(IDS + ["D"], "bin").decode(raw)
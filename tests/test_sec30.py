@@ -0,0 +1,102 @@
+import asyncio
+from src.core.transport import LoopbackBus, Outbox
+from src.sec30_node import Sec30Node
+
+A, B, C, D, E = (f"sec30.grupo{i}.nodo{i}" for i in range(1, 6))
+# A-B y A-C directos; detrás de B está D y detrás de C está E
+TOPO = {A: {B: 1, C: 2}, B: {A: 1, D: 1}, C: {A: 2, E: 1}, D: {B: 1}, E: {C: 1}}
+
+def make_node(node_id=A):
+    bus = LoopbackBus()
+    node = Sec30Node(node_id, TOPO, transport=bus.transport())
+    node.outbox = Outbox(node.transport, window_ms=0)
+    return node
+
+def hello(src, dst=A, w=1):
+    return {"type": "hello", "from": src, "to": dst, "hops": w}
+
+def test_legacy_neighbors_are_routable():
+    # B y C mandan hello y anuncios por enlace ("message"), nunca un lsa
+    async def run():
+        node = make_node()
+        await node._on_hello(hello(B, w=1))
+        await node._on_hello(hello(C, w=2))
+        await node._on_message({"type": "message", "from": B, "to": D, "hops": 1}, prev_hop=B)
+        await node._on_message({"type": "message", "from": C, "to": E, "hops": 1}, prev_hop=C)
+        return node
+    node = asyncio.run(run())
+    assert node._path_info(B)[:3] == (1, 1, B)
+    assert node._path_info(C)[:3] == (1, 2, C)
+    assert node._path_info(D) == (2, 2, B, [A, B, D])
+    assert node._path_info(E) == (2, 3, C, [A, C, E])
+
+def test_lsa_neighbor_still_needs_two_way():
+    # C habla lsa pero no lista a A: el enlace A-C no se usa; B (legacy) sigue andando
+    async def run():
+        node = make_node()
+        await node._on_hello(hello(B, w=1))
+        await node._on_hello(hello(C, w=2))
+        await node._on_lsa({"type": "lsa", "from": C, "seq": 1, "links": {E: 1}})
+        return node
+    node = asyncio.run(run())
+    assert node._path_info(B)[:3] == (1, 1, B)
+    assert node._path_info(C)[0] is None
+    node._store_lsa(C, 2, {A: 2, E: 1})
+    assert node._path_info(C)[:3] == (1, 2, C)
+
+def test_older_lsa_gets_the_stored_copy_back():
+    # B reinició sin snapshot y arranca de seq 1; A tiene su lsa 7 y se lo devuelve
+    async def run():
+        node = make_node()
+        b = node.transport.bus.transport()
+        await b.subscribe(B)
+        node._store_lsa(B, 7, {A: 1, D: 1})
+        await node._on_hello(hello(B))
+        while not b.queue.empty():
+            b.queue.get_nowait()
+        await node._on_lsa({"type": "lsa", "from": B, "seq": 1, "links": {A: 1}})
+        return [node.codec.decode(b.queue.get_nowait()) for _ in range(b.queue.qsize())]
+    sent = asyncio.run(run())
+    assert [(m["type"], m["from"], m["seq"]) for m in sent] == [("lsa", B, 7)]
+
+def test_no_origination_before_any_hello():
+    async def run():
+        node = make_node()
+        node.outbox = None
+        task = asyncio.create_task(node._decay_loop())
+        await asyncio.sleep(0.05)
+        pending = node.lsa_gen.pending or node.lsa_gen.runs
+        task.cancel()
+        return pending
+    import src.sec30_node as mod
+    old, mod.DECAY_INTERVAL = mod.DECAY_INTERVAL, 0.01
+    try:
+        assert not asyncio.run(run())
+    finally:
+        mod.DECAY_INTERVAL = old
+
+def test_hello_failure_is_per_neighbor():
+    # el canal de B falla: C recibe su hello igual y el lazo sigue vivo
+    class Flaky(LoopbackBus):
+        def deliver(self, channel, data):
+            if channel == B:
+                raise ConnectionError("caído")
+            return super().deliver(channel, data)
+    async def run():
+        bus = Flaky()
+        node = Sec30Node(A, TOPO, transport=bus.transport())
+        node.outbox = Outbox(node.transport, window_ms=0)
+        c = bus.transport()
+        await c.subscribe(C)
+        import src.sec30_node as mod
+        old, mod.HELLO_INTERVAL = mod.HELLO_INTERVAL, 0.01
+        try:
+            task = asyncio.create_task(node._hello_loop())
+            await asyncio.sleep(0.05)
+            alive = not task.done()
+            task.cancel()
+        finally:
+            mod.HELLO_INTERVAL = old
+        return alive, c.queue.qsize()
+    alive, got = asyncio.run(run())
+    assert alive and got >= 2
@@ -0,0 +1,31 @@
+import asyncio, queue
+from src.run_sharded import IpcHub, partition
+
+
+def test_partition_covers_all_nodes():
+    topo = {"A": {"B": 1}, "B": {"A": 1, "C": 1}, "C": {"B": 1}, "D": {}}
+    shards = partition(topo, 2)
+    assert sorted(n for s in shards for n in s) == ["A", "B", "C", "D"]
+
+
+def test_ipc_fans_out_to_every_subscribed_shard():
+    # como en Redis: un canal escuchado en dos shards recibe en los dos
+    async def run():
+        inboxes = [queue.Queue(), queue.Queue()]
+        hubs = [IpcHub(0, inboxes), IpcHub(1, inboxes)]
+        for h in hubs:
+            h.start()
+        owner, peer, other = hubs[0].transport(), hubs[1].transport(), hubs[1].transport()
+        await owner.subscribe("X")
+        await peer.subscribe("X")
+        await other.subscribe("Y")
+        await asyncio.sleep(0.1)  # avisos de suscripción
+        await peer.publish("X", b"m1")
+        got = [await owner.get_message(1.0), await peer.get_message(1.0), await other.get_message(0.1)]
+        for h in hubs:
+            h.stop()
+        return got, hubs[1].stats()
+
+    got, stats = asyncio.run(run())
+    assert got == [b"m1", b"m1", None]
+    assert stats["local_sent"] == 1 and stats["remote_sent"] == 1
@@ -0,0 +1,87 @@
+import asyncio
+from src.algorithms.distance_vector import DistanceVector
+from src.core.snapshot import Snapshot
+from src.core.transport import LoopbackBus
+from src.core.utils import DV_HOLD, LSP_MAX_AGE, now_ms
+from src.node import Node
+from src.sec30_node import Sec30Node
+
+def lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+def test_roundtrip_appends_only_changes(tmp_path):
+    path = tmp_path / "n.snap"
+    snap = Snapshot(str(path))
+    assert snap.load() == (None, {})
+    snap.checkpoint({"a": 1, "b": {"x": [1, 2]}}, 10.0)
+    snap.checkpoint({"a": 1, "b": {"x": [1, 3]}}, 11.0)  # solo cambia b
+    snap.checkpoint({"b": {"x": [1, 3]}}, 12.0)           # se borra a
+    snap.checkpoint({"b": {"x": [1, 3]}}, 13.0)           # sin cambios: solo la fecha
+    assert len(lines(path)) == 5
+    assert Snapshot(str(path)).load() == (13.0, {"b": {"x": [1, 3]}})
+
+def test_compaction_rewrites_live_keys(tmp_path):
+    path = tmp_path / "n.snap"
+    snap = Snapshot(str(path), compact_ratio=2.0)
+    for t in range(40):
+        snap.checkpoint({"k": t, "fixed": "x"}, float(t))
+    assert len(lines(path)) <= 2 * 16
+    assert not (tmp_path / "n.snap.tmp").exists()
+    assert Snapshot(str(path)).load() == (39.0, {"k": 39, "fixed": "x"})
+
+def test_truncated_tail_is_ignored_and_rewritten(tmp_path):
+    path = tmp_path / "n.snap"
+    snap = Snapshot(str(path))
+    snap.checkpoint({"a": 1}, 1.0)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"ts":2.0,"k":"a","v":')  # caída a mitad de escritura
+    again = Snapshot(str(path))
+    assert again.load() == (1.0, {"a": 1})
+    again.checkpoint({"a": 2}, 3.0)
+    assert Snapshot(str(path)).load() == (3.0, {"a": 2})
+
+def test_dv_vectors_age_out():
+    dv = DistanceVector("A")
+    dv.set_neighbor_cost("B", 1)
+    dv.ingest_vector("B", {"C": 1}, now=0.0)
+    dv.recompute()
+    assert dv.table["C"]["next"] == "B"
+    assert dv.age_out(5.0, hold=10.0) == []
+    assert dv.age_out(11.0, hold=10.0) == ["B"]
+    dv.recompute()
+    assert dv.table["C"]["cost"] == float("inf")
+
+def test_restored_dv_vector_keeps_its_age(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.node.snapshot_for", lambda d, i: Snapshot(str(tmp_path / f"{i}.snap")))
+    now = now_ms() / 1000
+    Snapshot(str(tmp_path / "A.snap")).checkpoint({
+        "proto": "dvr", "table": {"C": {"cost": 2, "next": "B"}, "D": {"cost": 2, "next": "E"}},
+        "dv/B": {"vector": {"C": 1}, "rx": now - 1},
+        "dv/E": {"vector": {"D": 1}, "rx": now - DV_HOLD - 1},  # E calló antes de reiniciar
+    }, now)
+    async def run():
+        node = Node("A", "dvr", {"B": 1, "E": 1}, {n: n for n in "ABCDE"}, transport=LoopbackBus().transport())
+        node._restore()
+        return node
+    node = asyncio.run(run())
+    assert set(node.dv.vectors_from_neighbors) == {"B"}
+    assert node.routing_table["C"]["next"] == "B" and "D" not in node.routing_table
+    assert node.dv.age_out(now + DV_HOLD, DV_HOLD) == ["B"]
+
+def test_restored_legacy_edge_ages_unless_confirmed(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.sec30_node.snapshot_for", lambda d, i: Snapshot(str(tmp_path / f"{i}.snap")))
+    a, b, c, d = (f"sec30.grupo{i}.nodo{i}" for i in range(1, 5))
+    now = now_ms() / 1000
+    Snapshot(str(tmp_path / f"{a}.snap")).checkpoint(
+        {"seq": 3, "edges": [[b, c, 1, now - 5], [c, b, 1, now - 5], [c, d, 1, now - 5], [d, c, 1, now - 5]]}, now)
+    async def run():
+        node = Sec30Node(a, {a: {b: 1}}, transport=LoopbackBus().transport())
+        node._restore()
+        node.outbox = None
+        node._flood = lambda m, prev_hop: asyncio.sleep(0)
+        await node._on_message({"type": "message", "from": b, "to": c, "hops": 1}, prev_hop=b)
+        return node
+    node = asyncio.run(run())
+    node._age_out(now + LSP_MAX_AGE)
+    assert c in node.G[b] and d not in node.G.get(c, {})
+    assert (c, d) not in node.edge_cache
@@ -0,0 +1,41 @@
+import random
+import pytest
+from src.algorithms.dijkstra import dijkstra
+from src.algorithms.spf import IncrementalSPF, INF
+
+def reference(adj, source):
+    """Distancias alcanzables con Dijkstra completo sobre el mismo grafo."""
+    graph = {u: dict(nbrs) for u, nbrs in adj.items()}
+    for nbrs in adj.values():
+        for v in nbrs:
+            graph.setdefault(v, {})
+    graph.setdefault(source, {})
+    dist, _ = dijkstra(graph, source)
+    return {v: d for v, d in dist.items() if d < INF}
+
+def test_repeated_edge_in_batch_uses_last_weight():
+    spf = IncrementalSPF("0")
+    spf.update([("0", "1", 5)])
+    spf.update([("1", "0", 7), ("1", "0", 8)])
+    assert spf.dist["1"] == 8 == spf.weight("0", "1")
+
+def test_add_then_delete_in_batch():
+    spf = IncrementalSPF("0")
+    spf.update([("0", "4", 1), ("0", "1", 10)])
+    spf.update([("4", "1", 7), ("4", "1", None)])
+    assert spf.weight("4", "1") is None
+    assert spf.dist["1"] == 10
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_matches_full_dijkstra(seed):
+    rng = random.Random(seed)
+    nodes = [str(i) for i in range(12)]
+    spf = IncrementalSPF("0")
+    for _ in range(30):
+        # lotes con aristas repetidas, altas, bajas y cambios de peso mezclados
+        batch = []
+        for _ in range(rng.randint(1, 6)):
+            u, v = rng.sample(nodes, 2)
+            batch.append((u, v, None if rng.random() < 0.3 else rng.randint(1, 10)))
+        spf.update(batch)
+        assert spf.dist == reference(spf.adj, "0")
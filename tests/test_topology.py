@@ -0,0 +1,16 @@
+import json
+from src.core.topology import CompiledTopology, compile_topology, topology_ids
+
+TOPO = {"N1": {"N2": 1, "N3": 4}, "N2": {"N1": 1}, "N3": {"N1": 4, "N4": 2}}
+NAMES = {"N1": "ch.n1", "N2": "ch.n2", "N3": "ch.n3", "N4": "ch.n4", "N5": "ch.n5"}
+
+def test_compiled_ids_match_json_ids(tmp_path):
+    path = tmp_path / "t.topo"
+    path.write_bytes(compile_topology(TOPO, NAMES))
+    ct = CompiledTopology(str(path))
+    try:
+        assert ct.ids.all() == topology_ids(TOPO, NAMES) == ["N1", "N2", "N3", "N4", "N5"]
+        assert ct.neighbors("N3") == {"N1": 4, "N4": 2}
+        assert dict(ct.channel_map()) == NAMES
+    finally:
+        ct.close()